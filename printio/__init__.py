@@ -19,4 +19,9 @@ __copyright__ = "Copyright 2011, Mike Taylor <mike@taylortree.com>"
 __license__ = "MIT"
 
 from core import PrettyValue
-from core import PrettyValues
\ No newline at end of file
+from core import PrettyValues
+from core import RenderContext
+from core import RenderStats
+from table import PrettyTable
+from table import LiveDisplay
+from table import PrettyPages
@@ -0,0 +1,531 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2012, Mike Taylor
+#
+# This file is part of printio released under MIT license.
+# See the LICENSE for more information.
+
+"""
+
+Format the columns of NumPy arrays and pandas DataFrames in a batch.
+
+Integer and fixed precision float columns are turned into characters
+with array arithmetic instead of formatting one value at a time.  The
+output is the same as formatting each value with PrettyValue.
+
+"""
+
+import sys
+import array
+import itertools
+
+import display
+
+try:
+    import numpy
+
+except ImportError:
+    numpy = None
+
+
+#Largest magnitude whose scaled float value is formatted with arithmetic.
+_MAX_SCALED = 2.0 ** 52
+
+#Largest precision with an exact power of ten as a float.
+_MAX_PRECISION = 15
+
+_ZERO = ord('0')
+
+#array.array type codes of numbers.
+_NUMBER_TYPECODES = 'bBhHiIlLfd'
+
+#Number of DataFrame rows read at a time when iterating the rows.
+_FRAME_ROWS = 1000
+
+#Default value formats of DataFrame columns by the kind of their dtype.
+_FRAME_VFORMATS = {'i': 'i',
+                   'u': 'i',
+                   'f': 'f',
+                   'M': '%Y-%m-%d %H:%M:%S'}
+
+
+def is_array(values):
+    """Returns True if values is a 2-D array or a structured array.
+
+    :param values: values to pretty format.
+    """
+    if numpy is None or not isinstance(values, numpy.ndarray):
+        return False
+
+    if values.dtype.names:
+        return values.ndim == 1
+
+    return values.ndim == 2
+
+
+def is_frame(values):
+    """Returns True if values is a pandas DataFrame.
+
+    pandas is never imported here, a DataFrame can only exist once the
+    caller has imported it.
+
+    :param values: values to pretty format.
+    """
+    pandas = sys.modules.get('pandas')
+    if pandas is None:
+        return False
+
+    return isinstance(values, pandas.DataFrame)
+
+
+def default_columns(values):
+    """Returns the default column keys and value formats: the column
+    labels and a format based on the dtype of a DataFrame, the field
+    names of a structured array or the column indices of a 2-D array.
+
+    :param values: array accepted by is_array or is_frame.
+    :rtype: list of (key, vformat) tuples.
+    """
+    if is_frame(values):
+        results = []
+        for key in values.columns:
+            kind = values[key].dtype.kind
+            results.append((key, _FRAME_VFORMATS.get(kind)))
+
+        return results
+
+    if values.dtype.names:
+        keys = values.dtype.names
+
+    else:
+        keys = range(values.shape[1])
+
+    return [(key, None) for key in keys]
+
+
+def get_column(values, key):
+    """Returns the 1-D array of the column named by key.  The column of
+    a DataFrame is its underlying array and is not copied.
+
+    :param values: array accepted by is_array or is_frame.
+    :param key: column label, field name or index of the column.
+    """
+    if is_frame(values):
+        if key not in values.columns:
+            msg = "Invalid key: '%s' columns: %s" % (key, list(values.columns))
+            raise KeyError(msg)
+
+        return values[key].values
+
+    names = values.dtype.names
+    if not names:
+        return values[:, key]
+
+    if key not in names:
+        if isinstance(key, (int, long)) and -len(names) <= key < len(names):
+            key = names[key]
+
+        else:
+            msg = "Invalid key: '%s' fields: %s" % (key, names)
+            raise KeyError(msg)
+
+    return values[key]
+
+
+def iter_rows(values, keys):
+    """Generate a dict for each row of a DataFrame, reading the columns
+    a chunk of rows at a time.
+
+    :param values: DataFrame to read.
+    :param keys: labels of the columns to read.
+    """
+    keys = list(set(keys))
+
+    for start in xrange(0, len(values), _FRAME_ROWS):
+        stop = start + _FRAME_ROWS
+
+        columns = []
+        for key in keys:
+            columns.append(python_values(get_column(values, key)[start:stop]))
+
+        for row in itertools.izip(*columns):
+            yield dict(itertools.izip(keys, row))
+
+
+def python_values(column):
+    """Returns the column with datetime64 values as datetime objects
+    so they can be formatted with strftime specifiers.  NaT values are
+    NAT, which formats as NaT.
+    """
+    if column.dtype.kind == 'M':
+        missing = numpy.isnat(column)
+        column = column.astype('M8[us]').astype(object)
+        if missing.any():
+            column[missing] = NAT
+
+        return column
+
+    return column
+
+
+class _NotATime(object):
+    """Stands in for a missing datetime64 value, which formats as NaT
+    with any format specifier.
+    """
+    __slots__ = ()
+
+    def __format__(self, spec):
+        return 'NaT'
+
+    def __str__(self):
+        return 'NaT'
+
+    def __repr__(self):
+        return 'NaT'
+
+NAT = _NotATime()
+
+
+def format_sequence(pv, column):
+    """Returns the formatted column of a list, array.array or 1-D array.
+
+    :param pv: PrettyValue used to format the values.
+    :param column: sequence of values.
+    :rtype: object with a maxwidth attribute and a padded method.
+    """
+    if numpy is not None:
+        if isinstance(column, numpy.ndarray):
+            return format_column(pv, column)
+
+        #numbers in an array.array are read in place as a NumPy array.
+        if (isinstance(column, array.array)
+                and column.typecode in _NUMBER_TYPECODES
+                and pv.typesummary in ('int', 'float')):
+            column = numpy.frombuffer(column, column.typecode)
+            return format_column(pv, column)
+
+    return pv.format_values(list(column))
+
+
+def format_column(pv, column):
+    """Returns the formatted column of values.
+
+    :param pv: PrettyValue used to format the values.
+    :param column: 1-D array of values.
+    :rtype: object with a maxwidth attribute and a padded method.
+    """
+    if pv.typesummary in ('int', 'float') and len(pv.fill) <= 1:
+        if pv.typesummary == 'int':
+            parts = _int_parts(pv, column)
+
+        else:
+            parts = _float_parts(pv, column)
+
+        if parts is not None:
+            return pv.limit_column(NumberColumn(pv, column, *parts))
+
+    column = python_values(column)
+
+    if pv.cache is not None:
+        return pv.format_values(column.tolist())
+
+    if pv.typesummary in ('int', 'float') or column.dtype.kind == 'O':
+        column = column.tolist()
+
+    return pv.limit_column(TextColumn(pv, map(pv.unpadded_formatter(),
+                                              column)))
+
+
+def _int_parts(pv, column):
+    """Returns the sign and magnitude of the values of an integer
+    column or None if the column can't be formatted with arithmetic.
+    """
+    kind = column.dtype.kind
+
+    if kind == 'f':
+        if not numpy.isfinite(column).all():
+            return None
+
+        column = numpy.trunc(column)
+        if len(column) and numpy.abs(column).max() >= 2.0 ** 63:
+            return None
+
+        column = column.astype(numpy.int64)
+        kind = 'i'
+
+    if kind == 'u':
+        negative = numpy.zeros(len(column), bool)
+        magnitude = column.astype(numpy.uint64)
+
+    elif kind in 'ib':
+        column = column.astype(numpy.int64)
+        negative = column < 0
+
+        #-(x + 1) + 1 keeps the smallest int64 from overflowing.
+        magnitude = numpy.where(negative, -(column + 1), column)
+        magnitude = magnitude.astype(numpy.uint64)
+        magnitude += negative
+
+    else:
+        return None
+
+    return negative, magnitude, None, None
+
+
+def _float_parts(pv, column):
+    """Returns the sign, integer part and fraction of the values of a
+    float column rounded to the precision and the indices of values
+    that must be formatted one at a time, or None if the column can't
+    be formatted with arithmetic.
+    """
+    precision = pv.precision
+    if column.dtype.kind not in 'biuf' or precision > _MAX_PRECISION:
+        return None
+
+    values = column.astype(numpy.float64)
+    if pv.atype == '%':
+        values = values * 100.0
+
+    finite = numpy.isfinite(values)
+
+    scaled = numpy.where(finite, values, 0.0) * (10.0 ** precision)
+    rounded = numpy.rint(scaled)
+    absolute = numpy.abs(scaled)
+
+    #The scaled value carries at most half an ulp of error, so rounding
+    # it gives the correctly rounded decimal unless it lies that close
+    # to halfway between two integers.
+    exact = finite & (absolute < _MAX_SCALED)
+    exact &= (0.5 - numpy.abs(scaled - rounded)) > absolute * 2.0 ** -50
+
+    slow = numpy.flatnonzero(~exact)
+
+    magnitude = numpy.where(exact, numpy.abs(rounded), 0.0)
+    magnitude = magnitude.astype(numpy.uint64)
+
+    scale = numpy.uint64(10 ** precision)
+    fraction = magnitude % scale
+    magnitude //= scale
+
+    return numpy.signbit(values), magnitude, fraction, slow
+
+
+def _digits(magnitude):
+    """Returns the number of decimal digits of each unsigned value."""
+    ndigits = numpy.ones(len(magnitude), numpy.int64)
+
+    for power in xrange(1, 20):
+        bigger = magnitude >= numpy.uint64(10 ** power)
+        if not bigger.any():
+            break
+
+        ndigits += bigger
+
+    return ndigits
+
+
+class TextColumn(object):
+    """A column of values formatted one at a time."""
+    def __init__(self, pv, texts, maxwidth=None, plain=None):
+        """
+        :param pv: PrettyValue used to format the values.
+        :param texts: list of unpadded formatted values.
+        :param maxwidth: (optional) display width of the widest of the
+            texts when it is already known.
+        :param plain: (optional) whether the texts are plain when it is
+            already known, see PrettyValue.is_plain.
+        """
+        self.pad_column = pv.pad_column
+        self.texts = texts
+
+        if plain is None:
+            plain = pv.is_plain(texts)
+
+        self.plain = plain
+
+        if maxwidth is not None:
+            self.maxwidth = maxwidth
+            return
+
+        self.maxwidth = 0
+        if texts and self.plain:
+            self.maxwidth = max(itertools.imap(len, texts))
+
+        elif texts:
+            self.maxwidth = max(itertools.imap(display.text_width, texts))
+
+    def padded(self, width):
+        """Returns the list of values padded to width."""
+        return self.pad_column(self.texts, width, self.plain)
+
+
+class NumberColumn(object):
+    """A column of numbers formatted with array arithmetic."""
+    def __init__(self, pv, column, negative, magnitude, fraction, slow):
+        """
+        :param pv: PrettyValue used to format the values.
+        :param column: 1-D array of the values.
+        :param negative: boolean array of the values with a minus sign.
+        :param magnitude: unsigned integer part of the values.
+        :param fraction: unsigned digits after the decimal point or None.
+        :param slow: indices of the values formatted one at a time or
+            None.
+        """
+        self.pv = pv
+        self.count = len(column)
+
+        self.texts = {}
+        if slow is not None and len(slow):
+            formatter = pv.unpadded_formatter()
+            for idx, value in itertools.izip(slow, column[slow].tolist()):
+                self.texts[idx] = formatter(value)
+
+            keep = numpy.ones(self.count, bool)
+            keep[slow] = False
+
+            negative = negative[keep]
+            magnitude = magnitude[keep]
+            fraction = fraction[keep]
+
+        self.index = None
+        if self.texts:
+            self.index = numpy.flatnonzero(keep)
+
+        self.signs = numpy.zeros(len(negative), numpy.uint8)
+        if pv.sign in ('+', ' '):
+            self.signs.fill(ord(pv.sign))
+
+        self.signs[negative] = ord('-')
+
+        self.magnitude = magnitude
+        self.fraction = fraction
+        self.ndigits = _digits(magnitude)
+
+        self.precision = 0
+        if fraction is not None:
+            self.precision = pv.precision
+
+        self.suffix = ''
+        if pv.atype == '%':
+            self.suffix = '%'
+
+        #length of each value less the sign.
+        self.bodies = self.ndigits + len(self.suffix)
+        if self.precision:
+            self.bodies += self.precision + 1
+
+        self.lengths = self.bodies + (self.signs != 0)
+
+        self.maxwidth = 0
+        if len(self.lengths):
+            self.maxwidth = int(self.lengths.max())
+
+        for text in self.texts.itervalues():
+            self.maxwidth = max(self.maxwidth, len(text))
+
+    def padded(self, width):
+        """Returns the list of values padded to width."""
+        pv = self.pv
+
+        results = self._render(max(width, self.maxwidth, 1))
+
+        if not self.texts:
+            return results.tolist()
+
+        padded = numpy.empty(self.count, object)
+        padded[self.index] = results
+
+        for idx, text in self.texts.iteritems():
+            if len(text) < width:
+                text = pv.pad(text, width)
+
+            padded[idx] = text
+
+        return padded.tolist()
+
+    def _render(self, width):
+        """Returns the array of the values padded to width."""
+        pv = self.pv
+        count = len(self.lengths)
+        fill = ord(pv.fill or ' ')
+
+        if not count:
+            return numpy.zeros(0, 'S%s' % width)
+
+        #Lay the values out right-aligned at their widest length, where
+        # every digit of the same power shares a column of the matrix.
+        #Sign-aware alignment keeps the signs in a column of their own.
+        if pv.align == '=':
+            size = int(self.bodies.max())
+
+        else:
+            size = int(self.lengths.max())
+
+        matrix = numpy.empty((count, size), numpy.uint8)
+        matrix.fill(fill)
+
+        end = size
+        if self.suffix:
+            end -= 1
+            matrix[:, end] = ord(self.suffix)
+
+        if self.precision:
+            fraction = self.fraction.copy()
+            for power in xrange(self.precision):
+                end -= 1
+                digits = (fraction % numpy.uint64(10)).astype(numpy.uint8)
+                matrix[:, end] = digits + _ZERO
+                fraction //= numpy.uint64(10)
+
+            end -= 1
+            matrix[:, end] = ord('.')
+
+        magnitude = self.magnitude.copy()
+        for power in xrange(int(self.ndigits.max())):
+            end -= 1
+            digits = (magnitude % numpy.uint64(10)).astype(numpy.uint8)
+            digits += _ZERO
+            matrix[:, end] = numpy.where(self.ndigits > power, digits, fill)
+            magnitude //= numpy.uint64(10)
+
+        signed = numpy.flatnonzero(self.signs)
+        if pv.align == '=':
+            if width > size:
+                padding = numpy.empty((count, width - size), numpy.uint8)
+                padding.fill(fill)
+                matrix = numpy.hstack((padding, matrix))
+
+            #a value as wide as the column has no sign.
+            matrix[signed, 0] = self.signs[signed]
+
+        elif pv.align == '>':
+            starts = size - self.lengths
+            matrix[signed, starts[signed]] = self.signs[signed]
+
+            padding = numpy.empty((count, width - size), numpy.uint8)
+            padding.fill(fill)
+            matrix = numpy.hstack((padding, matrix))
+
+        else:
+            starts = size - self.lengths
+            matrix[signed, starts[signed]] = self.signs[signed]
+
+            #shift each value from the right edge to where it starts.
+            if pv.align == '<':
+                starts = numpy.zeros(count, numpy.int64)
+
+            else:
+                starts = (width - self.lengths) // 2
+
+            padding = numpy.empty((count, width), numpy.uint8)
+            padding.fill(fill)
+            matrix = numpy.hstack((padding, matrix, padding))
+
+            offsets = size - self.lengths - starts + width
+            columns = numpy.arange(width) + offsets[:, numpy.newaxis]
+            matrix = matrix[numpy.arange(count)[:, numpy.newaxis], columns]
+
+        matrix = numpy.ascontiguousarray(matrix)
+
+        return matrix.view('S%s' % width).ravel()
@@ -0,0 +1,393 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2012, Mike Taylor
+#
+# This file is part of printio released under MIT license.
+# See the LICENSE for more information.
+"""
+
+Benchmark the core module.
+
+Each benchmark reports the best time of a few runs, the cells formatted
+per second and the peak memory used, which is measured in a fresh
+process for each benchmark where tracemalloc isn't available.  The
+results are written as JSON and can be compared against a stored
+baseline:
+
+    python bench_core.py --output results.json
+    python bench_core.py --compare baseline.json
+
+The committed baseline.json was measured on one machine, so regenerate it
+with --output on the machine the comparisons are run on.
+
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import random
+import datetime
+import optparse
+import subprocess
+
+libpath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if not libpath in sys.path:
+    sys.path.insert(1, libpath)
+del libpath
+
+from core import PrettyValue
+from core import PrettyValues
+
+try:
+    import tracemalloc
+
+except ImportError:
+    tracemalloc = None
+
+try:
+    import resource
+
+except ImportError:
+    resource = None
+
+
+#Slowdown over the baseline reported as a regression.
+TOLERANCE = 0.25
+
+#Number of rows of the tall tables and columns of the wide tables at a
+# scale of 1.
+TALL_ROWS = 20000
+WIDE_COLUMNS = 200
+
+
+def _values(atype, count):
+    """Returns a list of values for a format type."""
+    rand = random.Random(atype)
+
+    if atype == 's':
+        return ['sym%d' % rand.randint(0, 9999) for idx in xrange(count)]
+
+    if atype == 'i':
+        return [rand.randint(-10 ** 6, 10 ** 6) for idx in xrange(count)]
+
+    if atype == 'special':
+        specials = (float('nan'), float('inf'), float('-inf'), 1.5)
+        return [specials[idx % 4] for idx in xrange(count)]
+
+    if atype == 'date':
+        start = datetime.datetime(2012, 1, 1)
+        return [start + datetime.timedelta(minutes=rand.randint(0, 10 ** 6))
+                for idx in xrange(count)]
+
+    return [rand.uniform(-10 ** 4, 10 ** 4) for idx in xrange(count)]
+
+
+def _rows(nrows, ncols):
+    """Returns a list of lists of mixed values and the layout."""
+    kinds = ('i', 's', 'f', '%', 'date')
+    columns = []
+    pv = PrettyValues()
+    for idx in xrange(ncols):
+        kind = kinds[idx % len(kinds)]
+        columns.append(_values(kind, nrows))
+
+        vformat = {'i': 'i',
+                   's': None,
+                   'f': '+.2f',
+                   '%': '.1%',
+                   'date': '%Y-%m-%d %H:%M'}[kind]
+
+        pv.newcol(idx, vformat, cname='col%d' % idx)
+
+    return map(list, zip(*columns)), pv
+
+
+def _dicts(rows):
+    """Returns the list of lists as a list of dicts."""
+    return [dict(enumerate(row)) for row in rows]
+
+
+def _value_benchmarks(scale):
+    """PrettyValue.format of each format type."""
+    count = int(TALL_ROWS * scale)
+
+    specs = (('value_s', None, 's'),
+             ('value_i', 'i', 'i'),
+             ('value_f', '+.2f', 'f'),
+             ('value_percent', '.1%', 'f'),
+             ('value_strftime', '%Y-%m-%d %H:%M', 'date'),
+             ('value_special', '=+10.2f', 'special'))
+
+    for name, rawtext, kind in specs:
+        values = _values(kind, count)
+
+        def run(rawtext=rawtext, values=values):
+            pv = PrettyValue(rawtext)
+            for value in values:
+                pv.format(value)
+
+        yield name, count, run
+
+
+def _table_benchmarks(scale):
+    """PrettyValues.format and text of tall and wide tables."""
+    nrows = int(TALL_ROWS * scale)
+    tall, tall_layout = _rows(nrows, 5)
+
+    wide_rows = max(1, nrows // 100)
+    wide, wide_layout = _rows(wide_rows, WIDE_COLUMNS)
+
+    tables = (('lists', tall, tall_layout),
+              ('dicts', _dicts(tall), tall_layout),
+              ('wide', wide, wide_layout))
+
+    for name, values, layout in tables:
+        cells = len(values) * len(layout.cols)
+
+        def run_format(values=values, layout=layout):
+            layout.reset()
+            layout.format(values)
+
+        def run_text(values=values, layout=layout):
+            layout.reset()
+            layout.text(values, title='Benchmark')
+
+        yield 'format_%s' % name, cells, run_format
+        yield 'text_%s' % name, cells, run_text
+
+
+def benchmarks(scale=1.0):
+    """Generate the name, the number of cells formatted and the callable
+    of each benchmark.
+
+    :param scale: (optional) multiplier of the number of values.
+    """
+    for benchmark in _value_benchmarks(scale):
+        yield benchmark
+
+    for benchmark in _table_benchmarks(scale):
+        yield benchmark
+
+
+def measure(run, repeat=5):
+    """Returns the best time of the runs and the peak memory in KB.
+
+    The peak is traced with tracemalloc where it is available, otherwise
+    it is left to peak_memory.
+
+    :param run: callable to time.
+    :param repeat: (optional) number of times to run.
+    :rtype: tuple of seconds and peak KB or None if it isn't traced.
+    """
+    best = None
+    for idx in xrange(repeat):
+        gc.collect()
+        start = time.time()
+        run()
+        elapsed = time.time() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    gc.collect()
+    if tracemalloc is not None:
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1] // 1024
+
+        finally:
+            tracemalloc.stop()
+
+    else:
+        peak = None
+
+    return best, peak
+
+
+def _maxrss():
+    """Returns the maximum resident set size of the process in KB or None
+    if it can't be read.
+    """
+    #VmHWM starts over on exec, the ru_maxrss of linux keeps the high of
+    # the parent process.
+    try:
+        with open('/proc/self/status') as fp:
+            for line in fp:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+
+    except IOError:
+        pass
+
+    if resource is None:
+        return None
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    #darwin reports bytes rather than KB.
+    if sys.platform == 'darwin':
+        maxrss //= 1024
+
+    return maxrss
+
+
+def _run_peak(name, scale=1.0):
+    """Returns the growth of the maximum resident set size in KB of one
+    run of the benchmark, after its values are made.
+
+    :param name: name of the benchmark.
+    :param scale: (optional) multiplier of the number of values.
+    """
+    for bname, cells, run in benchmarks(scale):
+        if bname == name:
+            gc.collect()
+            before = _maxrss()
+            run()
+            return _maxrss() - before
+
+    raise KeyError("Invalid benchmark: '%s'" % (name,))
+
+
+def peak_memory(name, scale=1.0):
+    """Returns the peak memory in KB of one run of the benchmark measured
+    in a fresh process, as the maximum resident set size of a process
+    only grows the first time a new high is reached.
+
+    :param name: name of the benchmark.
+    :param scale: (optional) multiplier of the number of values.
+    :rtype: peak KB or None if it can't be measured.
+    """
+    if _maxrss() is None:
+        return None
+
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__),
+                                '--peak', '--scale', repr(scale), name],
+                               stdout=subprocess.PIPE)
+    output = process.communicate()[0]
+    if process.returncode:
+        return None
+
+    return int(output)
+
+
+def run_benchmarks(scale=1.0, repeat=5, names=None, out=None):
+    """Returns the results of the benchmarks.
+
+    :param scale: (optional) multiplier of the number of values.
+    :param repeat: (optional) number of times each benchmark is run.
+    :param names: (optional) names of the benchmarks to run.
+        * None: run all of the benchmarks.
+    :param out: (optional) file-like object the progress is written to.
+    :rtype: dict of the results.
+    """
+    results = {}
+    for name, cells, run in benchmarks(scale):
+        if names and name not in names:
+            continue
+
+        seconds, peak = measure(run, repeat)
+        if peak is None:
+            peak = peak_memory(name, scale)
+
+        results[name] = {'cells': cells,
+                         'seconds': seconds,
+                         'cells_per_sec': cells / max(seconds, 1e-9),
+                         'peak_kb': peak}
+
+        if out is not None:
+            out.write('%-16s %10d cells %9.4fs %12.0f cells/s\n' %
+                      (name, cells, seconds, results[name]['cells_per_sec']))
+
+    memory = 'none'
+    if tracemalloc is not None:
+        memory = 'tracemalloc'
+
+    elif _maxrss() is not None:
+        memory = 'maxrss'
+
+    return {'python': sys.version.split()[0],
+            'platform': sys.platform,
+            'scale': scale,
+            'memory': memory,
+            'benchmarks': results}
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Returns the benchmarks slower than the baseline by more than the
+    tolerance.  Benchmarks missing from either are skipped.
+
+    :param results: results of run_benchmarks.
+    :param baseline: results of run_benchmarks stored earlier.
+    :param tolerance: (optional) allowed slowdown as a fraction.
+    :rtype: list of (name, cells per second, baseline cells per second).
+    """
+    regressions = []
+    for name in sorted(results['benchmarks']):
+        try:
+            expected = baseline['benchmarks'][name]['cells_per_sec']
+
+        except KeyError:
+            continue
+
+        actual = results['benchmarks'][name]['cells_per_sec']
+        if actual < expected * (1.0 - tolerance):
+            regressions.append((name, actual, expected))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = optparse.OptionParser(usage='%prog [options] [benchmark ...]')
+    parser.add_option('--scale', type='float', default=1.0,
+                      help='multiplier of the number of values')
+    parser.add_option('--repeat', type='int', default=5,
+                      help='number of times each benchmark is run')
+    parser.add_option('--output', metavar='FILE',
+                      help='write the results as JSON to FILE')
+    parser.add_option('--compare', metavar='FILE',
+                      help='compare the results against the baseline FILE')
+    parser.add_option('--tolerance', type='float', default=TOLERANCE,
+                      help='allowed slowdown over the baseline')
+    parser.add_option('--peak', action='store_true',
+                      help='print the peak memory in KB of one benchmark')
+
+    options, names = parser.parse_args(argv)
+
+    if options.peak:
+        if len(names) != 1:
+            parser.error('--peak takes one benchmark')
+
+        sys.stdout.write('%d\n' % _run_peak(names[0], options.scale))
+        return 0
+
+    results = run_benchmarks(options.scale,
+                             options.repeat,
+                             names,
+                             out=sys.stdout)
+
+    if options.output:
+        with open(options.output, 'w') as fp:
+            json.dump(results, fp, indent=2, sort_keys=True,
+                      separators=(',', ': '))
+
+    if options.compare:
+        with open(options.compare) as fp:
+            baseline = json.load(fp)
+
+        regressions = compare(results, baseline, options.tolerance)
+        for name, actual, expected in regressions:
+            sys.stdout.write('regression: %s %.0f cells/s, baseline %.0f\n' %
+                             (name, actual, expected))
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
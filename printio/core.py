@@ -12,13 +12,62 @@ Pretty-up your data for print or display.
 
 """
 
+import os
 import re
 import math
-try:
-    from cStringIO import StringIO
+import time
+import marshal
+import tempfile
+import threading
+import itertools
+import collections
+import multiprocessing
 
-except:
-    from StringIO import StringIO
+import arrays
+import display
+
+
+_RAWTYPE_REGEX = re.compile(r"""
+                 ([<^>=]{1})?   #0 or 1 align specifier
+                 ([\s+-]{1})?   #0 or 1 sign specifier
+                 (\s+)?         #0 or 1 spaces that shouldn't be there.
+                 (\d+)?         #0 or 1 width specifier
+                 (\.+\d+)?      #decimal and precision specifier
+                 (.+)?$         #what's left
+                """, re.VERBOSE)
+
+#Parsed format specifiers keyed by the raw format text, emptied when it
+# holds _FORMATTERS_MAXSIZE of them like the formatters.
+_parsed_rawtypes = {}
+
+#Compiled formatting callables keyed by the resolved format options.
+#Identical columns share the same callable.
+_formatters = {}
+_FORMATTERS_MAXSIZE = 4096
+
+#Column formatting callables keyed by the resolved format options.
+_column_formatters = {}
+
+#Padding callables keyed by the resolved format options less the width.
+_padders = {}
+_column_padders = {}
+
+#Types formatted by the int and float column fast paths.
+_INT_TYPES = frozenset((int, long))
+_FLOAT_TYPES = frozenset((float,))
+
+#Number of records written to a spill file at a time.
+_SPILL_ROWS = 1000
+
+#Number of strings handed to writelines at a time, two per text line.
+_WRITE_CHUNK = 2048
+
+#Fewest rows worth handing to a worker process when formatting in
+# parallel.
+_PARALLEL_ROWS = 1000
+
+#Text shown in place of the rows and columns left out of a table.
+_ELLIPSIS = '...'
 
 
 class PrettyValue(object):
@@ -33,6 +82,46 @@ class PrettyValue(object):
     >>> pv.format('Center')
     '**Center**'
     """
+    __slots__ = ('atype',
+                 '_atype',
+                 'typesummary',
+                 'align',
+                 'fill',
+                 'sign',
+                 'width',
+                 'precision',
+                 'maxwidth',
+                 '_basewidth',
+                 'cache',
+                 'limit',
+                 'wrap',
+                 '_formatter',
+                 '_unpadded',
+                 '_padder')
+
+    aligns = {}
+    aligns['<'] = ('left', '<')
+    aligns['^'] = ('center', '^')
+    aligns['>'] = ('right', '>')
+    aligns['='] = ('rightpad', '=')
+
+    aligns['left'] = aligns['<']
+    aligns['center'] = aligns['^']
+    aligns['right'] = aligns['>']
+    aligns['rightpad'] = aligns['=']
+
+    validsigns = ('+', '-', ' ')
+
+    validstrings = ('s', '')
+    validints = ('d', 'i')
+    validfloats = ('f', '%')
+
+    validnums = validints + validfloats
+
+    knowntypes = validstrings + validnums
+
+    regex = _RAWTYPE_REGEX
+
     def __init__(self, rawtext=None,
                        fill=None,
                        align=None,
@@ -52,41 +141,9 @@ class PrettyValue(object):
                 after sign (default for numbers).
         :param width: (optional) length of formatted string.
         """
-        self.aligns = {}
-        self.aligns['<'] = ('left', '<')
-        self.aligns['^'] = ('center', '^')
-        self.aligns['>'] = ('right', '>')
-        self.aligns['='] = ('rightpad', '=')
-
-        self.aligns['left'] = self.aligns['<']
-        self.aligns['center'] = self.aligns['^']
-        self.aligns['right'] = self.aligns['>']
-        self.aligns['rightpad'] = self.aligns['=']
-
-        self.validsigns = ('+', '-', ' ')
-
-        self.validstrings = ('s', '')
-        self.validints = ('d', 'i')
-        self.validfloats = ('f', '%')
-
-        self.validnums = []
-        self.validnums.extend(self.validints)
-        self.validnums.extend(self.validfloats)
-
-        self.knowntypes = []
-        self.knowntypes.extend(self.validstrings)
-        self.knowntypes.extend(self.validnums)
-
-        _text = r"""
-                 ([<^>=]{1})?   #0 or 1 align specifier
-                 ([\s+-]{1})?   #0 or 1 sign specifier
-                 (\s+)?         #0 or 1 spaces that shouldn't be there.
-                 (\d+)?         #0 or 1 width specifier
-                 (\.+\d+)?      #decimal and precision specifier
-                 (.+)?$         #what's left
-                """
-
-        self.regex = re.compile(_text, re.VERBOSE)
+        self.cache = None
+        self.limit = None
+        self.wrap = False
 
         self.setoptions(rawtext,
                         fill=fill,
@@ -135,6 +192,8 @@ class PrettyValue(object):
         else:
             self.set_width(options['width'])
 
+        self._basewidth = self.width
+
         self.set_precision(options['precision'])
 
     def parse_rawtype(self, rawtype=None):
@@ -158,11 +217,16 @@ class PrettyValue(object):
         if not rawtype:
             return results
 
-        rawtype = rawtype.rstrip()
+        try:
+            return dict(_parsed_rawtypes[rawtype])
+
+        except KeyError:
+            pass
 
-        match = self.regex.search(rawtype)
+        match = self.regex.search(rawtype.rstrip())
         if not match:
-            return results
+            _keep_parsed(rawtype, results)
+            return dict(results)
 
         groups = match.groups()
 
@@ -184,7 +248,9 @@ class PrettyValue(object):
         if groups[bar]:
             results['atype'] = groups[bar].strip()
 
-        return results
+        _keep_parsed(rawtype, results)
+
+        return dict(results)
 
     def set_atype(self, atype=None):
         """
@@ -194,6 +260,7 @@ class PrettyValue(object):
             * 'f': float
             * '%': percent
         """
+        self._clear_compiled()
         self.atype = ''
         self._atype = ''
         self.typesummary = ''
@@ -231,6 +298,7 @@ class PrettyValue(object):
             * right or >: right-align value (default for numbers).
             * rightpad or =: right-align number with padding after sign.
         """
+        self._clear_compiled()
         self.align = ''
 
         if not align:
@@ -260,6 +328,7 @@ class PrettyValue(object):
 
         :param fill: (optional) fill character for the leftover space.
         """
+        self._clear_compiled()
         self.fill = ''
 
         if fill or fill == 0 or fill == ' ':
@@ -273,6 +342,7 @@ class PrettyValue(object):
             * '-': only show '-' for negative numbers.
             * ' ': show ' ' for positive numbers, '-' if negative.
         """
+        self._clear_compiled()
         self.sign = ''
 
         if not sign:
@@ -298,10 +368,71 @@ class PrettyValue(object):
 
         :param width: (optional) size of the destination string.
         """
+        self._clear_compiled()
         self.width = ''
         if width:
             self.width = int(width)
 
+    def set_cache(self, maxsize=None):
+        """Keep the formatted strings of the most recently used values
+        when formatting a column of values with format_values or one
+        value at a time with cached_formatter.  The rows formatted in
+        worker processes and the number arrays, which are formatted with
+        arithmetic, don't go through the cache.
+
+        :param maxsize: (optional) number of values kept.
+            * None: don't keep any values.
+        """
+        self.cache = None
+        if maxsize is not None:
+            self.cache = ValueCache(maxsize)
+
+    def set_limit(self, limit=None, wrap=False):
+        """Cap the width of a column of values formatted with
+        format_values.  Values wider than the column are fitted to it
+        with fit.
+
+        :param limit: (optional) most characters of a value shown.
+            * None: show all of each value.
+        :param wrap: (optional) if True - wrap wider values onto more
+            lines instead of cutting them.
+        """
+        if limit is not None and limit < 1:
+            msg = "invalid limit: '%s'" % (limit,)
+            raise ValueError(msg)
+
+        self.limit = limit
+        self.wrap = wrap
+
+    def fit(self, text, width):
+        """Returns a formatted value wider than width fitted to it.  The
+        value is cut and ends with '~', or when wrapping, broken into
+        lines of at most width joined by newlines and each padded to
+        width.  See display.wrap.
+
+        :param text: formatted string wider than width.
+        :param width: width of the column.
+        """
+        if not self.wrap:
+            return ''.join((display.cut(text, width - 1), '~'))
+
+        lines = display.wrap(text, width)
+
+        return '\n'.join([self.pad(line, display.pad_width(line, width))
+                          for line in lines])
+
+    def limit_column(self, column):
+        """Returns the formatted column with its values fitted to the
+        width of the column, or the column itself without a limit.
+
+        :param column: object with a maxwidth attribute and a padded
+            method, as returned by format_values.
+        """
+        if self.limit is None:
+            return column
+
+        return LimitedColumn(self, column)
+
     def set_precision(self, precision=None):
         """Specify how many decimal points to show.
 
@@ -309,6 +440,7 @@ class PrettyValue(object):
             decimal place to show.
                 * default is 4.
         """
+        self._clear_compiled()
         self.precision = ''
 
         if not precision:
@@ -332,337 +464,2605 @@ class PrettyValue(object):
             msg = "%s, atype:'%s'" % (msg, self.atype)
             raise ValueError(msg)
 
+    def reset(self):
+        """Forget the widths of the values formatted so far.  maxwidth
+        is zeroed and the width goes back to the one set with the options.
+        """
+        self.maxwidth = 0
+
+        if self.width != self._basewidth:
+            self.set_width(self._basewidth)
+
     def format(self, value):
         """Returns a formatted string based on the format specifiers.
 
         :param value: value to format.
         :rtype: pretty formatted string.
         """
-        newvalue = value
-        newatype = self._atype
-        newprecision = ''
-        newsign = self.sign
-        newalign = self.align
+        formatter = self._formatter
+        if formatter is None:
+            formatter = self._compile()
 
-        if self.typesummary == 'str':
-            newvalue = str(value)
+        result = formatter(value)
 
-        elif self.typesummary == 'int':
-            newvalue = int(value)
+        newwidth = len(result)
+        if newwidth > self.maxwidth:
+            self.maxwidth = newwidth
 
-        elif self.typesummary == 'float':
-            newvalue = float(value)
+        return result
 
-            if math.isnan(newvalue):
-                newvalue = "{0!r}".format(newvalue)
-                newatype = 's'
-                newsign = ''
-                if newalign == '=':
-                    newalign = '>'
+    def _clear_compiled(self):
+        """Drop the compiled callables so they are rebuilt with the
+        current options."""
+        self._formatter = None
+        self._unpadded = None
+        self._padder = None
+
+    def _options(self, width):
+        """Returns the resolved format options with the given width."""
+        return (self.typesummary,
+                self._atype,
+                self.fill,
+                self.align,
+                self.sign,
+                width,
+                self.precision)
+
+    def _compile(self):
+        """Build the formatting callable for the current options.
+
+        The callable is cached until one of the option setters runs and
+        is shared by every PrettyValue with the same options.
+        :rtype: callable accepting a single value.
+        """
+        self._formatter = _get_formatter(self._options(self.width))
 
-            elif math.isinf(newvalue):
-                newvalue = "{0!r}".format(newvalue)
-                newatype = 's'
+        return self._formatter
 
-                asign = ''
+    def unpadded_formatter(self):
+        """Returns a callable formatting a value as if no width was
+        given.  The result can be padded out to a width with pad.
 
-                beg_idx = 0
-                if newsign == '+':
-                    asign = '+'
+        :rtype: callable accepting a single value.
+        """
+        formatter = self._unpadded
+        if formatter is None:
+            formatter = _get_formatter(self._options(''))
+            self._unpadded = formatter
 
-                newsign = ''
+        return formatter
 
-                if newvalue[0] in ['+', '-']:
-                    asign = newvalue[0]
-                    beg_idx = 1
+    def cached_formatter(self):
+        """Returns the unpadded formatter, formatting through the cache
+        when there is one.  See set_cache.
 
-                newvalue = newvalue[beg_idx:]
+        :rtype: callable accepting a single value.
+        """
+        if self.cache is None:
+            return self.unpadded_formatter()
 
-                if newalign == '=':
-                    newalign = '>'
+        return self.cache.formatter(self)
 
-                    if len(newvalue) < self.width:
-                        specs = '{0:>%s%s}' % (self.width - 1, newatype)
+    def format_texts(self, values):
+        """Returns the list of the values formatted without padding, each
+        distinct value only once with a cache.  Like format_values but
+        the strings are returned rather than a column to pad.
 
-                    else:
-                        specs = '{0:>%s%s}' % (self.width, newatype)
+        :param values: list of values to format.
+        :rtype: list of strings.
+        """
+        if self.cache is not None:
+            column = self.cache.format_values(self, values)
+            if column is not None:
+                return map(column.texts.__getitem__, column.keys)
 
-                    newvalue = ''.join((asign, specs.format(newvalue)))
+        return self.unpadded_column_formatter()(values)
 
-                else:
-                    newvalue = ''.join((asign, newvalue))
+    def unpadded_column_formatter(self):
+        """Returns a callable formatting a list of values as if no width
+        was given.  Columns of only ints, or of only finite floats, are
+        formatted without checking each value.
 
-            elif self.precision:
-                newprecision = '.%s' % self.precision
+        :rtype: callable accepting a list of values and returning the
+            list of formatted strings.
+        """
+        return _get_column_formatter(self._options(''))
+
+    def format_values(self, values):
+        """Returns the formatted column of a list of values.  The width
+        of a column of only ints, or of only finite floats, is worked out
+        from its smallest and largest values and the values are only
+        formatted once, at the width of the column.  With a cache, each
+        distinct value is only formatted once.
+
+        :param values: list of values to format.
+        :rtype: object with a maxwidth attribute and a padded method
+            returning the list of values formatted to a width.
+        """
+        options = self._options('')
 
-        elif self.typesummary == 'unknown':
-            formatspecs = '{0:%s}' % (newatype,)
-            newvalue = formatspecs.format(newvalue)
-            newatype = 's'
+        if self.cache is not None:
+            column = self.cache.format_values(self, values)
+            if column is not None:
+                return self.limit_column(column)
 
-        formatspecs = '{%s:%s%s%s%s%s%s}' % (0,
-                                             self.fill,
-                                             newalign,
-                                             newsign,
-                                             self.width,
-                                             newprecision,
-                                             newatype)
+        maxwidth = _predict_width(options, values)
+        if maxwidth is not None:
+            return self.limit_column(WidthColumn(options, values, maxwidth))
 
-        result = formatspecs.format(newvalue)
+        formatter = _get_column_formatter(options)
 
-        newwidth = len(result)
-        if newwidth > self.maxwidth:
-            self.maxwidth = newwidth
+        return self.limit_column(arrays.TextColumn(self, formatter(values)))
 
-        return result
+    def pad_column(self, texts, width, plain=None):
+        """Returns the list of texts each padded out to width, the same
+        as padding them one at a time with pad.
 
+        :param texts: list of strings returned by the unpadded formatter.
+        :param width: display width of the padded strings.
+        :param plain: (optional) if the texts are known to be ASCII
+            without escape sequences.
+            * None: check the texts.
+        :rtype: list of pretty formatted strings.
+        """
+        if plain is None:
+            plain = self.is_plain(texts)
 
-class PrettyValues(object):
-    """Pretty format values based on various formatting
-    options.
+        #wide characters and escape sequences are padded one at a time.
+        if not plain:
+            pad = self.pad
+            return [pad(text, display.pad_width(text, width)) for text in texts]
 
-    Usage:
-    >>> lol = []
-    >>> lol.append([0, 'yhoo', 23.45])
-    >>> lol.append([1, 'goog', 200.4565])
-    >>> lol.append([2, 't', 1.00])
-    >>> pv = PrettyValues()
-    >>> pv.newcol(0, 'i', cname='Bar')
-    >>> pv.newcol(1, cname='Symbol')
-    >>> pv.newcol(2, '+.2f', cname='Close')
-    >>> print pv.text(lol)
-    +-----+--------+---------+
-    | Bar | Symbol | Close   |
-    +-----+--------+---------+
-    |   0 | yhoo   | + 23.45 |
-    |   1 | goog   | +200.46 |
-    |   2 | t      | +  1.00 |
-    +-----+--------+---------+
-    """
-    def __init__(self):
-        self.cols = []
-        self.cformatters = {}
-        self.vformatters = {}
+        options = self._options(None)
+        try:
+            padder = _column_padders[options]
 
-    def newcol(self,
-               key=None,
-               vformat=None,
-               vfill=None,
-               cname=None,
-               cformat=None,
-               cfill=None):
-        """Specify column attributes for prettying up your values.
+        except KeyError:
+            padder = _compile_column_padder(*options)
+            _column_padders[options] = padder
 
-        :param key: (optional) index of list or key of the dict to format.
-        :param vformat: (optional) format specifier of the values
-            for the column.
-        :param vfill: (optional) fill character for the values.
-        :param cname: (optional) name of the column.
-        :param cformat: (optional) format specifier for the column name.
-        :param cfill: (optional) fill character for the column name.
+        return padder(texts, width)
+
+    def is_plain(self, texts):
+        """Returns True if the formatted texts are ASCII without escape
+        sequences, so their display width is their length.  Formatted
+        numbers always are.
+
+        :param texts: list of strings returned by the unpadded formatter.
         """
-        if not key:
-            if self.cols:
-                key = len(self.cols)
+        if self.typesummary in ('int', 'float'):
+            return True
+
+        return display.is_plain_column(texts)
+
+    def pad(self, text, width):
+        """Returns text padded out to width with the fill and alignment
+        options.  Padding the result of the unpadded formatter gives the
+        same string as formatting the value at that width.
+
+        :param text: string returned by the unpadded formatter.
+        :param width: length of the padded string.
+        :rtype: pretty formatted string.
+        """
+        padder = self._padder
+        if padder is None:
+            options = self._options(None)
+            try:
+                padder = _padders[options]
+
+            except KeyError:
+                padder = _compile_padder(*options)
+                _padders[options] = padder
+
+            self._padder = padder
+
+        return padder(text, width)
+
+
+def _keep_parsed(rawtype, results):
+    """Keep the parsed format specifiers of the raw format text."""
+    if len(_parsed_rawtypes) >= _FORMATTERS_MAXSIZE:
+        _parsed_rawtypes.clear()
+
+    _parsed_rawtypes[rawtype] = results
+
+
+def _get_formatter(options):
+    """Returns the shared formatting callable for the resolved options.
+
+    :param options: tuple of the _compile_formatter arguments.
+    :rtype: callable accepting a single value.
+    """
+    try:
+        return _formatters[options]
+
+    except KeyError:
+        if len(_formatters) >= _FORMATTERS_MAXSIZE:
+            _formatters.clear()
+
+        formatter = _compile_formatter(*options)
+        _formatters[options] = formatter
+
+        return formatter
+
+
+def _format_special(value, fill, align, sign, width):
+    """Returns the formatted string of a NaN or infinite float.
+
+    :param value: float that is either NaN or infinite.
+    :rtype: pretty formatted string.
+    """
+    newvalue = "{0!r}".format(value)
+    newatype = 's'
+    newalign = align
+
+    if math.isnan(value):
+        if newalign == '=':
+            newalign = '>'
+
+    else:
+        asign = ''
+
+        beg_idx = 0
+        if sign == '+':
+            asign = '+'
+
+        if newvalue[0] in ['+', '-']:
+            asign = newvalue[0]
+            beg_idx = 1
+
+        newvalue = newvalue[beg_idx:]
+
+        if newalign == '=':
+            newalign = '>'
+
+            if len(newvalue) < (width or 0):
+                specs = '{0:>%s%s}' % (width - 1, newatype)
 
             else:
-                key = 0
+                specs = '{0:>%s%s}' % (width, newatype)
 
-        if not cname:
-            cname = key
+            newvalue = ''.join((asign, specs.format(newvalue)))
 
-        self.vformatters[key, cname] = PrettyValue(vformat, vfill)
+        else:
+            newvalue = ''.join((asign, newvalue))
 
-        self.cformatters[key, cname] = PrettyValue(cformat, cfill)
+    formatspecs = '{0:%s%s%s%s}' % (fill, newalign, width, newatype)
 
-        self.cols.append([key, cname])
+    return formatspecs.format(newvalue)
 
-    def get_text_title(self, title, rowlength):
-        """
-        Currently truncates the title to the length of the
-            maximum row size - 2.  Plans for the future
-            are to break a title into multiple lines if cannot
-            fit on one line.
-        :param title: the overall title for the text table.
-        :param rowlength: the length of the text table row.
-        """
-        colcnt = len(self.cols)
-        rowarea = rowlength + (colcnt * 3 + 1) - 4
 
-        _title = title.strip()[:rowarea]
+def _compile_formatter(typesummary, atype, fill, align, sign, width,
+                       precision):
+    """Returns a callable that formats a single value to a string.
 
-        padding = '-' * (rowarea + 2)
-        results = ''.join(('+', padding, '+', '\n'))
+    The format specification is assembled once here so formatting
+    a value is a single call without rebuilding or re-parsing the
+    specification string.
 
-        title_length = len(_title)
-        title_half = title_length / 2
+    :param typesummary: 'str', 'int', 'float' or 'unknown'.
+    :param atype: format type passed to the string format library.
+    :param fill: fill character for the leftover space.
+    :param align: alignment specifier.
+    :param sign: sign specifier.
+    :param width: length of the formatted string.
+    :param precision: digits to the right of the decimal place.
+    :rtype: callable accepting a single value.
+    """
+    if typesummary == 'str':
+        spec = '%s%s%s%s' % (fill, align, width, atype)
+        format_bytes = ('{0!s:%s}' % (spec,)).format
+        format_text = (u'{0:%s}' % (spec,)).format
 
-        lt_size = (rowarea / 2) - title_half
-        lt_padding = ' ' * lt_size
+        def format_str(value):
+            try:
+                return format_bytes(value)
 
-        rt_size = rowarea - (lt_size + title_length)
-        rt_padding = ' ' * rt_size
+            #unicode that isn't ASCII is formatted as UTF-8, like the
+            #byte strings it is printed with.
+            except UnicodeEncodeError:
+                return format_text(value).encode('utf-8')
 
-        lt_line = ''.join(('| ', lt_padding))
-        rt_line = ''.join((rt_padding, ' |', '\n'))
+        return format_str
 
-        line = ''.join((lt_line, _title, rt_line))
+    if typesummary == 'unknown':
+        outer = ('{0:%s%s%s%ss}' % (fill, align, sign, width)).format
 
-        results = ''.join((results, line))
+        def format_unknown(value):
+            return outer(format(value, atype))
 
-        return results
+        return format_unknown
 
-    def text(self, values, title=None, useheader=True):
-        """
-        :param values: list of values to pretty format to text.
-        :param title: give the text table a title.
-        :param header: if True (default) - headers returned with results.
-        """
-        records = self.format(values, useheader=useheader)
+    specs = _number_specs(atype, fill, align, sign, width, precision)
 
-        if not records:
-            return ''
+    if typesummary == 'int':
+        def format_int(value):
+            return specs(int(value))
 
-        output = StringIO()
+        return format_int
 
-        rowlength = len(''.join(records[0]))
+    nan_text = _format_special(float('nan'), fill, align, sign, width)
+    posinf_text = _format_special(float('inf'), fill, align, sign, width)
+    neginf_text = _format_special(float('-inf'), fill, align, sign, width)
 
-        #build the columnar dash line
-        dash_line = '+'
-        for row in records[0]:
-            dash_line = ''.join((dash_line, '-' * (len(row) + 2), '+'))
+    def format_float(value):
+        value = float(value)
 
-        #dash_line = ''.join((dash_line, '\n'))
+        #x - x is 0.0 for every finite float and NaN for NaN and inf.
+        if value - value == 0.0:
+            return specs(value)
 
-        #build the header record.
-        bar = 0
+        if value != value:
+            return nan_text
 
-        if title:
-            lines = self.get_text_title(title, rowlength)
-            output.write(lines)
+        if value > 0:
+            return posinf_text
 
-        if useheader:
-            headers = '|'
-            for row in records[0]:
-                headers = ''.join((headers, ' ', row, ' |'))
+        return neginf_text
 
-            line = ''.join((dash_line, '\n'))
-            output.write(line)
+    return format_float
 
-            line = ''.join((headers, '\n'))
-            output.write(line)
-            bar += 1
 
-        #build the detail records.
-        details = records[bar:]
+def _number_specs(atype, fill, align, sign, width, precision):
+    """Returns the format method of the specification of a number."""
+    newprecision = ''
+    if precision:
+        newprecision = '.%s' % precision
 
-        if details:
-            line = ''.join((dash_line, '\n'))
-            output.write(line)
+    return ('{0:%s%s%s%s%s%s}' % (fill,
+                                  align,
+                                  sign,
+                                  width,
+                                  newprecision,
+                                  atype)).format
 
-            for detail in details:
-                rows = '|'
-                for field in detail:
-                    rows = ''.join((rows, ' ', field, ' |'))
 
-                line = ''.join((rows, '\n'))
-                output.write(line)
+def _get_column_formatter(options):
+    """Returns the shared column formatting callable for the resolved
+    options.
 
-        lines = output.getvalue()
+    :param options: tuple of the _compile_formatter arguments.
+    :rtype: callable accepting a list of values.
+    """
+    try:
+        return _column_formatters[options]
 
-        if lines:
-            lines = ''.join((lines, dash_line))
+    except KeyError:
+        if len(_column_formatters) >= _FORMATTERS_MAXSIZE:
+            _column_formatters.clear()
 
-        return lines
+        formatter = _compile_column_formatter(*options)
+        _column_formatters[options] = formatter
 
-    def format(self, values, useheader=True):
-        """Return a pretty formatted list of values based on the
-        format specifiers of the columns.
+        return formatter
 
-        :param values: list of values to pretty format.
-        :param useheader: if True (default) - headers returned with results.
-        """
-        results = []
 
-        sizes = {}
+def _compile_column_formatter(typesummary, atype, fill, align, sign, width,
+                              precision):
+    """Returns a callable that formats a list of values to a list of
+    strings, the same as formatting each value with _compile_formatter.
 
-        #----------------------------------------------------------------------
-        #if user doesn't provide a set of columns then provide default
-        # column headings.  Either:
-        #   * indicies from a list or
-        #   * keys from a dictionary.
-        #----------------------------------------------------------------------
-        if not self.cols:
-            if not values:
-                return results
+    The column is scanned once up front.  Only ints, or only floats
+    without a NaN or inf, go straight to the string format library
+    without the conversion and special value checks of each value.
 
-            try:
-                keys = values[0].keys()
+    :rtype: callable accepting a list of values.
+    """
+    formatter = _get_formatter((typesummary, atype, fill, align, sign, width,
+                                precision))
 
-            except AttributeError:
-                keys = range(len(values[0]))
+    if typesummary not in ('int', 'float'):
+        def format_values(values):
+            return map(formatter, values)
 
-            for key in keys:
-                self.newcol(key)
+        return format_values
 
-        for key, cname in self.cols:
-            sizes[key] = 0
+    specs = _number_specs(atype, fill, align, sign, width, precision)
 
-        #This is the 1st pass to determine the maximum size of each column.
-        for row in values:
-            for key, cname in self.cols:
-                pv = self.vformatters[key, cname]
-                try:
-                    oldvalue = row[key]
+    if typesummary == 'int':
+        def format_ints(values):
+            if _INT_TYPES.issuperset(map(type, values)):
+                return map(specs, values)
 
-                except KeyError:
-                    msg = "Invalid key: '%s' row: %s" % (key, row)
-                    raise KeyError(msg)
+            return map(formatter, values)
 
-                newvalue = pv.format(oldvalue)
-                if pv.maxwidth > sizes[key]:
-                    sizes[key] = pv.maxwidth
+        return format_ints
 
-        #If using headers then build the column size based on:
-        #    a) max size of column heading  -- or --
-        #    b) max size of values in column.
-        #If not using headers then build the column size based on:
-        #    a) max size of values in column.
-        headers = []
-        for key, cname in self.cols:
-            pc = self.cformatters[key, cname]
-            newcol = pc.format(cname)
+    def format_floats(values):
+        if _FLOAT_TYPES.issuperset(map(type, values)):
+            #the sum is NaN or inf when any of the values is.
+            total = sum(values)
+            if total - total == 0.0:
+                return map(specs, values)
 
-            pv = self.vformatters[key, cname]
-            if useheader:
-                if pv.maxwidth > pc.maxwidth:
-                    pc.set_width(pv.maxwidth)
-                    pv.set_width(pv.maxwidth)
+        return map(formatter, values)
 
-                    newcol = pc.format(cname)
+    return format_floats
 
-                else:
-                    pv.set_width(pc.maxwidth)
 
-            else:
-                pv.set_width(pv.maxwidth)
+def _compile_padder(typesummary, atype, fill, align, sign, width,
+                    precision):
+    """Returns a callable that pads a string formatted without a width
+    out to a width, as the string format library would have done.
 
-            headers.append(newcol)
+    :param typesummary: 'str', 'int', 'float' or 'unknown'.
+    :param atype: format type passed to the string format library.
+    :param fill: fill character for the leftover space.
+    :param align: alignment specifier.
+    :param sign: sign specifier.
+    :param width: ignored, the width is given to the callable.
+    :param precision: digits to the right of the decimal place.
+    :rtype: callable accepting the text and the width.
+    """
+    fillchar = fill or ' '
 
-        if useheader:
-            results.append(headers)
+    if align == '<':
+        def pad_left(text, width):
+            return text.ljust(width, fillchar)
 
-        #Format based on the maximum size of the columns.
-        for row in values:
-            record = []
-            for key, cname in self.cols:
-                pv = self.vformatters[key, cname]
-                newvalue = pv.format(row[key])
-                record.append(newvalue)
+        return pad_left
 
-            results.append(record)
+    if align == '>':
+        def pad_right(text, width):
+            return text.rjust(width, fillchar)
 
-        return results
+        return pad_right
+
+    if align == '^':
+        def pad_center(text, width):
+            size = width - len(text)
+            if size <= 0:
+                return text
+
+            left = size // 2
+
+            return ''.join((fillchar * left, text, fillchar * (size - left)))
+
+        return pad_center
+
+    specials = _special_texts(typesummary, fill, align, sign)
+
+    def pad_sign(text, width):
+        size = width - len(text)
+        if size <= 0:
+            return text
+
+        if text in specials:
+            return _format_special(specials[text], fill, align, sign, width)
+
+        if text[0] in '+- ':
+            return ''.join((text[0], fillchar * size, text[1:]))
+
+        return ''.join((fillchar * size, text))
+
+    return pad_sign
+
+
+def _special_texts(typesummary, fill, align, sign):
+    """Returns the unpadded texts of NaN and inf mapped to their value.
+    They are not padded after the sign, so they are formatted again at
+    the requested width.
+    """
+    specials = {}
+    if typesummary == 'float':
+        for value in (float('nan'), float('inf'), float('-inf')):
+            text = _format_special(value, fill, align, sign, '')
+            specials[text] = value
+
+    return specials
+
+
+def _predict_width(options, values):
+    """Returns the width of the widest of the values formatted without
+    a width, or None if the values are not all ints or all finite floats.
+
+    The length of a formatted number only grows with its magnitude, so
+    the widest value is either the smallest or the largest one.  A
+    negative zero is the only value with a sign that is not below zero.
+
+    :param options: tuple of the _compile_formatter arguments.
+    :param values: list of values to format.
+    :rtype: width of the widest value or None.
+    """
+    typesummary, atype, fill, align, sign, width, precision = options
+
+    if not values:
+        return None
+
+    types = set(map(type, values))
+
+    if typesummary == 'int':
+        if not _INT_TYPES.issuperset(types):
+            return None
+
+    elif typesummary == 'float':
+        if not _FLOAT_TYPES.issuperset(types):
+            return None
+
+        #the sum is NaN or inf when any of the values is.
+        total = sum(values)
+        if total - total != 0.0:
+            return None
+
+    else:
+        return None
+
+    specs = _number_specs(atype, fill, align, sign, '', precision)
+
+    lowest = min(values)
+    highest = max(values)
+
+    maxwidth = max(len(specs(lowest)), len(specs(highest)))
+
+    if lowest == 0.0 and typesummary == 'float':
+        for value in values:
+            if value == 0.0 and math.copysign(1.0, value) < 0.0:
+                maxwidth = max(maxwidth, len(specs(value)))
+                break
+
+    return maxwidth
+
+
+class WidthColumn(object):
+    """A column of ints or finite floats whose width is known before
+    the values are formatted.
+    """
+    __slots__ = ('options', 'values', 'maxwidth')
+
+    def __init__(self, options, values, maxwidth):
+        """
+        :param options: tuple of the _compile_formatter arguments.
+        :param values: list of ints or finite floats.
+        :param maxwidth: width of the widest value formatted without
+            a width.
+        """
+        self.options = options
+        self.values = values
+        self.maxwidth = maxwidth
+
+    def padded(self, width):
+        """Returns the list of values formatted to width."""
+        typesummary, atype, fill, align, sign, blank, precision = self.options
+
+        specs = _number_specs(atype, fill, align, sign, width or '', precision)
+
+        return map(specs, self.values)
+
+
+class LimitedColumn(object):
+    """A formatted column whose values wider than the limit of its
+    PrettyValue are fitted to the width of the column.
+    """
+    __slots__ = ('pv', 'column', 'maxwidth')
+
+    def __init__(self, pv, column):
+        """
+        :param pv: PrettyValue with a limit used to format the values.
+        :param column: formatted column returned by format_values.
+        """
+        self.pv = pv
+        self.column = column
+        self.maxwidth = min(column.maxwidth, pv.limit)
+
+    def padded(self, width):
+        """Returns the list of values padded or fitted to width."""
+        texts = self.column.padded(width)
+        if self.column.maxwidth <= width:
+            return texts
+
+        fit = self.pv.fit
+
+        return [text if display.text_width(text) <= width
+                else fit(text, width)
+                for text in texts]
+
+
+class ValueCache(object):
+    """Formatted strings of the most recently used values of a column.
+
+    Values are keyed on their type and value so 1, 1.0 and True are
+    kept apart.  The cache is emptied when the format options change.
+    """
+    def __init__(self, maxsize):
+        """
+        :param maxsize: number of values kept.
+        """
+        if maxsize < 1:
+            msg = "invalid maxsize: '%s'" % (maxsize,)
+            raise ValueError(msg)
+
+        self.maxsize = maxsize
+
+        #number of values found in the cache and formatted anew.  A value
+        # repeated within one column is only looked up once.
+        self.hits = 0
+        self.misses = 0
+
+        self._options = None
+        self._texts = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._texts)
+
+    def clear(self):
+        """Forget the values kept and zero the counters."""
+        with self._lock:
+            self._texts.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def format_values(self, pv, values):
+        """Returns the formatted column of the values, formatting each
+        distinct value only once, or None if a value isn't hashable.
+
+        :param pv: PrettyValue the cache belongs to.
+        :param values: list of values to format.
+        :rtype: CachedColumn or None.
+        """
+        keys = zip(map(type, values), values)
+        try:
+            distinct = set(keys)
+
+        except TypeError:
+            return None
+
+        #0.0 and -0.0 are equal but formatted differently.
+        if (float, 0.0) in distinct:
+            keys = [(key[0], key[1], math.copysign(1.0, key[1]))
+                    if key[0] is float else key
+                    for key in keys]
+            distinct = set(keys)
+
+        options = pv._options('')
+        formatter = pv.unpadded_formatter()
+
+        texts = {}
+        with self._lock:
+            cached = self._texts
+            if options != self._options:
+                cached.clear()
+                self._options = options
+
+            misses = 0
+            for key in distinct:
+                try:
+                    text = cached.pop(key)
+
+                except KeyError:
+                    text = formatter(key[1])
+                    misses += 1
+
+                #NaN never equals itself so it is never found again.
+                if key[1] == key[1]:
+                    cached[key] = text
+
+                texts[key] = text
+
+            while len(cached) > self.maxsize:
+                cached.popitem(last=False)
+
+            self.hits += len(distinct) - misses
+            self.misses += misses
+
+        return CachedColumn(pv, keys, texts)
+
+    def formatter(self, pv):
+        """Returns a callable formatting one value through the cache, the
+        same as the unpadded formatter.  Values that aren't hashable are
+        formatted without the cache.
+
+        :param pv: PrettyValue the cache belongs to.
+        :rtype: callable accepting a single value.
+        """
+        options = pv._options('')
+        formatter = pv.unpadded_formatter()
+        cached = self._texts
+        lock = self._lock
+
+        def format_value(value):
+            key = (type(value), value)
+
+            #0.0 and -0.0 are equal but formatted differently.
+            if key[0] is float and value == 0.0:
+                key = (float, value, math.copysign(1.0, value))
+
+            with lock:
+                if options != self._options:
+                    cached.clear()
+                    self._options = options
+
+                try:
+                    text = cached.pop(key)
+
+                except KeyError:
+                    text = formatter(value)
+                    self.misses += 1
+
+                except TypeError:
+                    return formatter(value)
+
+                else:
+                    self.hits += 1
+
+                #NaN never equals itself so it is never found again.
+                if value == value:
+                    cached[key] = text
+                    if len(cached) > self.maxsize:
+                        cached.popitem(last=False)
+
+            return text
+
+        return format_value
+
+
+class CachedColumn(object):
+    """A column of values formatted once for each distinct value."""
+    __slots__ = ('pad_column', 'keys', 'texts', 'plain', 'maxwidth')
+
+    def __init__(self, pv, keys, texts):
+        """
+        :param pv: PrettyValue used to format the values.
+        :param keys: list of the cache key of each value.
+        :param texts: dict of the unpadded formatted value of each key.
+        """
+        self.pad_column = pv.pad_column
+        self.keys = keys
+        self.texts = texts
+        self.plain = pv.is_plain(texts.values())
+
+        self.maxwidth = 0
+        if texts and self.plain:
+            self.maxwidth = max(itertools.imap(len, texts.itervalues()))
+
+        elif texts:
+            self.maxwidth = max(itertools.imap(display.text_width,
+                                               texts.itervalues()))
+
+    def padded(self, width):
+        """Returns the list of values padded to width."""
+        distinct = self.texts.keys()
+        texts = self.pad_column([self.texts[key] for key in distinct],
+                                width,
+                                self.plain)
+        texts = dict(itertools.izip(distinct, texts))
+
+        return map(texts.__getitem__, self.keys)
+
+
+def _compile_column_padder(typesummary, atype, fill, align, sign, width,
+                           precision):
+    """Returns a callable that pads a list of strings out to a width,
+    the same as padding each string with _compile_padder.
+
+    :rtype: callable accepting the list of texts and the width.
+    """
+    fillchar = fill or ' '
+
+    if align == '<':
+        def pad_left(texts, width):
+            return [text.ljust(width, fillchar) for text in texts]
+
+        return pad_left
+
+    if align == '>':
+        def pad_right(texts, width):
+            return [text.rjust(width, fillchar) for text in texts]
+
+        return pad_right
+
+    padder = _compile_padder(typesummary, atype, fill, align, sign, width,
+                             precision)
+
+    if align == '^':
+        def pad_center(texts, width):
+            return [text if len(text) >= width else padder(text, width)
+                    for text in texts]
+
+        return pad_center
+
+    specials = _special_texts(typesummary, fill, align, sign)
+
+    def pad_sign(texts, width):
+        results = []
+        append = results.append
+        for text in texts:
+            size = width - len(text)
+            if size <= 0:
+                append(text)
+
+            elif text in specials:
+                append(padder(text, width))
+
+            elif text[0] in '+- ':
+                append(''.join((text[0], fillchar * size, text[1:])))
+
+            else:
+                append(''.join((fillchar * size, text)))
+
+        return results
+
+    return pad_sign
+
+
+class RenderStats(object):
+    """Timings and counters of the calls of an instrumented PrettyValues.
+
+    The phases timed are:
+        * format: formatting the values of the columns.
+        * size: sizing the columns and formatting the column names.
+        * pad: padding the values and joining them into records.
+        * assemble: joining the records into the lines of the text.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+
+        #wall and CPU seconds of each phase.
+        self.phases = {}
+
+        #counters of each column keyed by the key and name of the column,
+        # so columns with the same name are counted apart.
+        self.columns = {}
+
+    def start(self):
+        """Returns the wall and CPU time at the start of a phase."""
+        return time.time(), _cpu_time()
+
+    def stop(self, phase, started):
+        """Add the time since started to the phase.
+
+        :param phase: name of the phase.
+        :param started: value returned by start.
+        """
+        wall = time.time() - started[0]
+        cpu = _cpu_time() - started[1]
+
+        try:
+            timing = self.phases[phase]
+
+        except KeyError:
+            timing = self.phases[phase] = {'wall': 0.0, 'cpu': 0.0}
+
+        timing['wall'] += wall
+        timing['cpu'] += cpu
+
+    def count(self, col, cells, specials=0, hits=0, misses=0):
+        """Add to the counters of a column.
+
+        :param col: tuple of the key and name of the column.
+        :param cells: number of values formatted.
+        :param specials: (optional) number of NaN and inf values.
+        :param hits: (optional) number of values formatted from the cache.
+        :param misses: (optional) number of values the cache formatted.
+        """
+        try:
+            counters = self.columns[col]
+
+        except KeyError:
+            counters = self.columns[col] = {'cells': 0,
+                                            'specials': 0,
+                                            'cache_hits': 0,
+                                            'cache_misses': 0}
+
+        counters['cells'] += cells
+        counters['specials'] += specials
+        counters['cache_hits'] += hits
+        counters['cache_misses'] += misses
+
+    def as_dict(self):
+        """Returns a copy of the timings and counters as a dict."""
+        return {'calls': self.calls,
+                'bytes': self.bytes,
+                'phases': dict((phase, dict(timing))
+                               for phase, timing in self.phases.iteritems()),
+                'columns': dict((col, dict(counters))
+                                for col, counters
+                                in self.columns.iteritems())}
+
+
+class RenderContext(object):
+    """Column widths of a single render of a PrettyValues layout.
+
+    The widths are kept here instead of on the shared PrettyValue
+    formatters so one layout can be rendered by many threads at once.
+
+    :param columns: list of (key, cname, vformatter, cformatter) of each
+        column rendered.
+    """
+    __slots__ = ('columns', 'maxwidths')
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.maxwidths = None
+
+    def update(self, maxwidths):
+        """Widen the columns to the widest unpadded values.
+
+        :param maxwidths: list of the widest unpadded value of each column
+            or None when there are no values.
+        """
+        if not maxwidths:
+            return
+
+        if self.maxwidths is None:
+            self.maxwidths = list(maxwidths)
+
+        else:
+            self.maxwidths = map(max, self.maxwidths, maxwidths)
+
+    def size(self, useheader=True):
+        """Returns the column names and the width of each column.  A
+        column is as wide as the widest of its values, its width option
+        and, when used, its formatted name.  The widths left on the
+        formatters by format and text are not used.
+
+        :param useheader: if True (default) - size columns on the names too.
+        :rtype: tuple of the formatted column names and the widths.
+        """
+        headers = []
+        widths = []
+        for idx, (key, cname, pv, pc) in enumerate(self.columns):
+            width = 0
+            if self.maxwidths:
+                width = self.maxwidths[idx]
+                if pv.limit is not None and width > pv.limit:
+                    width = pv.limit
+
+                width = max(width, pv._basewidth or 0)
+
+            header = pc.unpadded_formatter()(cname)
+            size = display.text_width(header)
+            if useheader:
+                width = max(width, size, pc._basewidth or 0)
+
+            if size < width:
+                header = pc.pad(header, display.pad_width(header, width))
+
+            headers.append(header)
+            widths.append(width)
+
+        return headers, widths
+
+
+class PrettyValues(object):
+    """Pretty format values based on various formatting
+    options.
+
+    Usage:
+    >>> lol = []
+    >>> lol.append([0, 'yhoo', 23.45])
+    >>> lol.append([1, 'goog', 200.4565])
+    >>> lol.append([2, 't', 1.00])
+    >>> pv = PrettyValues()
+    >>> pv.newcol(0, 'i', cname='Bar')
+    >>> pv.newcol(1, cname='Symbol')
+    >>> pv.newcol(2, '+.2f', cname='Close')
+    >>> print pv.text(lol)
+    +-----+--------+---------+
+    | Bar | Symbol | Close   |
+    +-----+--------+---------+
+    |   0 | yhoo   | + 23.45 |
+    |   1 | goog   | +200.46 |
+    |   2 | t      | +  1.00 |
+    +-----+--------+---------+
+    """
+    overflows = ('widen', 'truncate', 'marker')
+
+    def __init__(self):
+        self.cols = []
+        self.cformatters = {}
+        self.vformatters = {}
+
+        self._stats = None
+        self._stats_callback = None
+        self._stats_depth = 0
+
+    def enable_stats(self, callback=None):
+        """Start recording the timings and counters of format, text and
+        write.  Nothing is recorded unless enabled.
+
+        :param callback: (optional) called with the dict of stats after
+            each call of format, text or write.
+        """
+        self._stats = RenderStats()
+        self._stats_callback = callback
+        self._stats_depth = 0
+
+    def disable_stats(self):
+        """Stop recording the timings and counters."""
+        self._stats = None
+        self._stats_callback = None
+
+    def stats(self):
+        """Returns the timings and counters recorded since enable_stats
+        or None if they aren't being recorded.
+
+        :rtype: dict of the calls, the output bytes, the wall and CPU
+            seconds of each phase and the counters of each column keyed by
+            the tuple of its key and name.
+        """
+        if self._stats is None:
+            return None
+
+        return self._stats.as_dict()
+
+    def _instrumented(self, method, *args, **kwargs):
+        """Call the method with the stats of the outermost call counted
+        once and handed to the callback.
+        """
+        self._stats_depth += 1
+        try:
+            return method(*args, **kwargs)
+
+        finally:
+            self._stats_depth -= 1
+
+            stats = self._stats
+            if stats is not None and not self._stats_depth:
+                stats.calls += 1
+
+                if self._stats_callback is not None:
+                    self._stats_callback(stats.as_dict())
+
+    def newcol(self,
+               key=None,
+               vformat=None,
+               vfill=None,
+               cname=None,
+               cformat=None,
+               cfill=None,
+               cache=None,
+               maxwidth=None,
+               wrap=False):
+        """Specify column attributes for prettying up your values.
+
+        :param key: (optional) index of list or key of the dict to format.
+        :param vformat: (optional) format specifier of the values
+            for the column.
+        :param vfill: (optional) fill character for the values.
+        :param cname: (optional) name of the column.
+        :param cformat: (optional) format specifier for the column name.
+        :param cfill: (optional) fill character for the column name.
+        :param cache: (optional) number of distinct values whose formatted
+            strings are kept between calls, for columns with many
+            repeated values.  See PrettyValue.set_cache.
+        :param maxwidth: (optional) most characters of a value shown.
+            Wider values are cut and end with '~' so one long value
+            doesn't widen every row of the column.
+        :param wrap: (optional) if True - wrap values wider than maxwidth
+            onto continuation lines of the text table instead of cutting
+            them.
+        """
+        if not key:
+            if self.cols:
+                key = len(self.cols)
+
+            else:
+                key = 0
+
+        if not cname:
+            cname = key
+
+        self.vformatters[key, cname] = PrettyValue(vformat, vfill)
+        self.vformatters[key, cname].set_cache(cache)
+        self.vformatters[key, cname].set_limit(maxwidth, wrap)
+
+        self.cformatters[key, cname] = PrettyValue(cformat, cfill)
+
+        self.cols.append([key, cname])
+
+    def reset(self):
+        """Forget the column widths of the values formatted so far so the
+        layout can be reused by format and text for another table.
+        """
+        for key, cname in self.cols:
+            self.vformatters[key, cname].reset()
+            self.cformatters[key, cname].reset()
+
+    def get_text_title(self, title, rowlength, colcnt=None):
+        """
+        Currently truncates the title to the length of the
+            maximum row size - 2.  Plans for the future
+            are to break a title into multiple lines if cannot
+            fit on one line.
+        :param title: the overall title for the text table.
+        :param rowlength: the length of the text table row.
+        :param colcnt: (optional) number of columns in the table row.
+            * None: the number of columns of the layout.
+        """
+        if colcnt is None:
+            colcnt = len(self.cols)
+        rowarea = rowlength + (colcnt * 3 + 1) - 4
+
+        if isinstance(title, unicode):
+            title = title.encode('utf-8')
+
+        _title = display.cut(title.strip(), rowarea)
+
+        padding = '-' * (rowarea + 2)
+        results = ''.join(('+', padding, '+', '\n'))
+
+        title_length = display.text_width(_title)
+        title_half = title_length / 2
+
+        lt_size = (rowarea / 2) - title_half
+        lt_padding = ' ' * lt_size
+
+        rt_size = rowarea - (lt_size + title_length)
+        rt_padding = ' ' * rt_size
+
+        lt_line = ''.join(('| ', lt_padding))
+        rt_line = ''.join((rt_padding, ' |', '\n'))
+
+        line = ''.join((lt_line, _title, rt_line))
+
+        results = ''.join((results, line))
+
+        return results
+
+    def text(self, values,
+                   title=None,
+                   useheader=True,
+                   workers=None,
+                   max_rows=None,
+                   max_cols=None):
+        """
+        :param values: list of values to pretty format to text.
+        :param title: give the text table a title.
+        :param header: if True (default) - headers returned with results.
+        :param workers: (optional) see format.
+        :param max_rows: (optional) see format.  A line under the table
+            counts the rows and columns left out.
+        :param max_cols: (optional) see format.
+        """
+        if self._stats is not None:
+            return self._instrumented(self._text, values, title, useheader,
+                                      workers, max_rows, max_cols)
+
+        return self._text(values, title, useheader, workers, max_rows,
+                          max_cols)
+
+    def _text(self, values, title, useheader, workers, max_rows, max_cols):
+        if max_rows is None and max_cols is None:
+            lines = self.iter_text(values,
+                                   title=title,
+                                   useheader=useheader,
+                                   window=None,
+                                   workers=workers)
+
+        else:
+            lines = self._iter_text_truncated(values,
+                                              title,
+                                              useheader,
+                                              max_rows,
+                                              max_cols)
+
+        stats = self._stats
+        if stats is None:
+            return '\n'.join(lines)
+
+        started = stats.start()
+        results = '\n'.join(lines)
+        stats.stop('assemble', started)
+        stats.bytes += len(results)
+
+        return results
+
+    def write(self, values, fp,
+                    title=None,
+                    useheader=True,
+                    window=None,
+                    overflow='widen',
+                    spill=False):
+        """Write the text table to a file-like object a chunk of lines
+        at a time, without building the whole table as a string.  Every
+        line written ends with a newline.
+
+        With the default window of None every row is formatted and held
+        in memory to size the columns, so the memory used grows with the
+        number of rows.  Give a window, or spill, to write a table of any
+        number of rows in bounded memory.
+
+        :param values: iterable of values to pretty format to text.
+        :param fp: file-like object with a writelines method.
+        :param title: give the text table a title.
+        :param useheader: if True (default) - headers returned with results.
+        :param window: (optional) number of rows used to size the columns.
+            * None: size the columns on all of the rows (default).
+        :param overflow: (optional) see iter_text.
+        :param spill: (optional) see iter_text.
+        :rtype: number of lines written.
+        """
+        if self._stats is not None:
+            return self._instrumented(self._write, values, fp, title,
+                                      useheader, window, overflow, spill)
+
+        return self._write(values, fp, title, useheader, window, overflow,
+                           spill)
+
+    def _write(self, values, fp, title, useheader, window, overflow, spill):
+        lines = self.iter_text(values,
+                               title=title,
+                               useheader=useheader,
+                               window=window,
+                               overflow=overflow,
+                               spill=spill)
+
+        return write_lines(lines, fp, self._stats)
+
+    def iter_text(self, values,
+                        title=None,
+                        useheader=True,
+                        window=1000,
+                        overflow='widen',
+                        spill=False,
+                        workers=None):
+        """Generate the lines of the text table one at a time.
+
+        Only the first window rows are held in memory to size the
+        columns, the remaining rows are formatted as they are read.
+
+        :param values: iterable of values or DataFrame to pretty format
+            to text.
+        :param title: give the text table a title.
+        :param useheader: if True (default) - headers returned with results.
+        :param window: (optional) number of rows used to size the columns.
+            * None: size the columns on all of the rows.
+        :param overflow: (optional) how to show a value wider than its
+            column once the columns are sized.
+            * widen: widen the column from that row on, the row is
+              drawn under a dash line of the new widths (default).
+            * truncate: cut the value to the column width.
+            * marker: cut the value and end it with '~'.
+        :param spill: (optional) if True - size the columns on all of the
+            rows by writing the formatted values to a temporary file
+            instead of holding them in memory.  window and overflow
+            are ignored.
+        :param workers: (optional) number of processes formatting the
+            rows used to size the columns.  See format.
+        :rtype: iterator of lines without the newline.
+        """
+        if arrays.is_frame(values) and (spill or window is not None):
+            if not self.cols and len(values):
+                self._default_array_cols(values)
+
+            keys = [key for key, cname in self.cols]
+            values = arrays.iter_rows(values, keys)
+
+        if spill:
+            return self._iter_text_spill(values, title, useheader)
+
+        if overflow not in self.overflows:
+            msg = "invalid overflow: '%s'" % (overflow,)
+            raise ValueError(msg)
+
+        if window is None:
+            remaining = ()
+
+            #format sizes and indexes the rows, so an iterator is read
+            # into a list first.
+            if not hasattr(values, '__len__'):
+                values = list(values)
+
+        else:
+            if window < 1:
+                msg = "invalid window: '%s'" % (window,)
+                raise ValueError(msg)
+
+            remaining = iter(values)
+            values = list(itertools.islice(remaining, window))
+
+        records = self.format(values, useheader=useheader, workers=workers)
+
+        return self._iter_text_records(records,
+                                       title,
+                                       useheader,
+                                       remaining,
+                                       overflow)
+
+    def _iter_text_truncated(self, values, title, useheader, max_rows,
+                                                               max_cols):
+        """Generate the text lines of the rows and columns shown by
+        format followed by a line counting those left out.
+        """
+        records = self.format(values,
+                              useheader=useheader,
+                              max_rows=max_rows,
+                              max_cols=max_cols)
+
+        for line in self._iter_text_records(records, title, useheader):
+            yield line
+
+        rows = 0
+        if max_rows is not None:
+            rows = max(0, len(values) - max_rows)
+
+        cols = 0
+        if max_cols is not None:
+            cols = max(0, len(self.cols) - max_cols)
+
+        if records and (rows or cols):
+            counts = []
+            if rows:
+                counts.append('%d of %d rows' % (rows, len(values)))
+
+            if cols:
+                counts.append('%d of %d columns' % (cols, len(self.cols)))
+
+            yield '%s not shown' % (' and '.join(counts),)
+
+    def _iter_text_records(self, records,
+                                 title,
+                                 useheader,
+                                 remaining=(),
+                                 overflow='widen'):
+        """Generate the text lines of the records returned by format
+        followed by the rows of remaining.
+        """
+        if not records:
+            return iter(())
+
+        widths = [display.text_width(field) for field in records[0]]
+
+        headers = None
+        if useheader:
+            headers = records.pop(0)
+
+        details = itertools.chain(records,
+                                  self._iter_remaining(remaining,
+                                                       widths,
+                                                       overflow))
+
+        return self._iter_text(headers, widths, details, title)
+
+    def _iter_text(self, headers, widths, details, title):
+        """Generate the text lines of a table.
+
+        :param headers: formatted column names or None for no header.
+        :param widths: width of each column, updated while the details
+            are read when a column is widened.  The row of a widened
+            column is drawn under a dash line of the new widths.
+        :param details: iterator of the padded records.
+        :param title: give the text table a title.
+        """
+        rowlength = sum(widths)
+        dash_line = text_dash_line(widths)
+
+        details = iter(details)
+
+        record = next(details, None)
+        if record is None and headers is None:
+            return
+
+        if title:
+            lines = self.get_text_title(title, rowlength, len(widths))
+            for line in lines.splitlines():
+                yield line
+
+        if headers is not None:
+            yield dash_line
+            yield text_line(headers)
+
+        if record is not None:
+            yield dash_line
+            details = itertools.chain([record], details)
+
+            lastwidths = list(widths)
+            for record in details:
+                if widths != lastwidths:
+                    lastwidths = list(widths)
+                    dash_line = text_dash_line(widths)
+                    yield dash_line
+
+                line = text_line(record)
+
+                #a wrapped value continues on the lines below.
+                if '\n' in line:
+                    for line in text_lines(record):
+                        yield line
+
+                else:
+                    yield line
+
+        yield dash_line
+
+    def _iter_remaining(self, values, widths, overflow):
+        """Generate the padded records of the rows read after the
+        columns were sized, one row at a time as they are read.  widths
+        is updated when a column is widened.
+        """
+        stats = self._stats
+
+        columns = []
+        for key, cname in self.cols:
+            pv = self.vformatters[key, cname]
+            if stats is None:
+                formatter = pv.cached_formatter()
+
+            else:
+                formatter = _counted_formatter(stats, (key, cname), pv)
+
+            columns.append((key, formatter, pv))
+
+        for row in values:
+            if stats is not None:
+                started = stats.start()
+
+            record = []
+            for key, formatter, pv in columns:
+                try:
+                    oldvalue = row[key]
+
+                except KeyError:
+                    msg = "Invalid key: '%s' row: %s" % (key, row)
+                    raise KeyError(msg)
+
+                record.append(formatter(oldvalue))
+
+            if stats is not None:
+                stats.stop('format', started)
+
+            #wide characters and escape sequences are measured one at a
+            # time, a row of ASCII is checked once.
+            plain = display.is_plain_column(record)
+
+            for idx, newvalue in enumerate(record):
+                pv = columns[idx][2]
+
+                width = widths[idx]
+                if plain:
+                    size = len(newvalue)
+
+                else:
+                    size = display.text_width(newvalue)
+
+                if size < width:
+                    newvalue = pv.pad(newvalue, width + len(newvalue) - size)
+
+                elif size > width:
+                    if overflow == 'widen':
+                        limit = pv.limit
+                        if limit is None or size <= limit:
+                            widths[idx] = size
+
+                        else:
+                            if width < limit:
+                                widths[idx] = width = limit
+
+                            newvalue = pv.fit(newvalue, width)
+
+                    elif overflow == 'truncate' or not width:
+                        newvalue = display.cut(newvalue, width)
+
+                    else:
+                        newvalue = ''.join((display.cut(newvalue, width - 1),
+                                            '~'))
+
+                record[idx] = newvalue
+
+            yield record
+
+    def _iter_text_spill(self, values, title, useheader):
+        """Generate the text lines of a table sized on all of the rows,
+        spilling the formatted values to a temporary file.
+        """
+        values = iter(values)
+
+        if not self.cols:
+            for row in values:
+                self._default_cols(row)
+                values = itertools.chain([row], values)
+                break
+
+            else:
+                return
+
+        spill = tempfile.TemporaryFile()
+        try:
+            maxwidths = self._spill(values, spill)
+
+            headers = self._size_columns(maxwidths, useheader)
+
+            if useheader:
+                widths = [display.text_width(field) for field in headers]
+
+            else:
+                headers = None
+                widths = [self.vformatters[key, cname].width or 0
+                          for key, cname in self.cols]
+
+            spill.seek(0)
+            details = self._iter_spilled(spill, widths)
+
+            for line in self._iter_text(headers, widths, details, title):
+                yield line
+
+        finally:
+            spill.close()
+
+    def _spill(self, values, spill):
+        """Format each value without padding and write the records in
+        chunks to the spill file.
+
+        :param values: iterable of values to pretty format.
+        :param spill: file the records are written to.
+        :rtype: list of the widest value of each column or None when
+            there are no values.
+        """
+        stats = self._stats
+        if stats is not None:
+            started = stats.start()
+
+        columns = []
+        for key, cname in self.cols:
+            pv = self.vformatters[key, cname]
+            if stats is None:
+                columns.append((key, pv.cached_formatter()))
+
+            else:
+                columns.append((key, _counted_formatter(stats,
+                                                        (key, cname),
+                                                        pv)))
+
+        maxwidths = None
+        records = []
+        for row in values:
+            record = []
+            for key, formatter in columns:
+                try:
+                    oldvalue = row[key]
+
+                except KeyError:
+                    msg = "Invalid key: '%s' row: %s" % (key, row)
+                    raise KeyError(msg)
+
+                record.append(formatter(oldvalue))
+
+            records.append(record)
+
+            if len(records) >= _SPILL_ROWS:
+                maxwidths = _maxwidths(records, maxwidths)
+                marshal.dump(records, spill)
+                records = []
+
+        if records:
+            maxwidths = _maxwidths(records, maxwidths)
+            marshal.dump(records, spill)
+
+        if stats is not None:
+            stats.stop('format', started)
+
+        return maxwidths
+
+    def _iter_spilled(self, spill, widths):
+        """Generate the padded records read back from the spill file."""
+        pads = []
+        fits = []
+        for key, cname in self.cols:
+            pv = self.vformatters[key, cname]
+            pads.append(pv.pad)
+            fits.append(pv.fit)
+
+        while True:
+            try:
+                records = marshal.load(spill)
+
+            except EOFError:
+                break
+
+            plains = [display.is_plain_column([record[idx]
+                                               for record in records])
+                      for idx in xrange(len(widths))]
+
+            for record in records:
+                for idx, newvalue in enumerate(record):
+                    width = widths[idx]
+                    if plains[idx]:
+                        size = len(newvalue)
+
+                    else:
+                        size = display.text_width(newvalue)
+
+                    if size < width:
+                        record[idx] = pads[idx](newvalue,
+                                                width + len(newvalue) - size)
+
+                    #only wider than a column with a limit.
+                    elif size > width:
+                        record[idx] = fits[idx](newvalue, width)
+
+                yield record
+
+    def _default_cols(self, row):
+        """Add a column for each index of a list or key of a dict.
+
+        :param row: the first of the values to pretty format.
+        """
+        try:
+            keys = row.keys()
+
+        except AttributeError:
+            keys = range(len(row))
+
+        for key in keys:
+            self.newcol(key)
+
+    def _default_array_cols(self, values):
+        """Add a column for each column of a NumPy array or DataFrame.
+
+        :param values: array or DataFrame to pretty format.
+        """
+        for key, vformat in arrays.default_columns(values):
+            self.newcol(key, vformat)
+
+    def _size_columns(self, maxwidths, useheader=True, cols=None):
+        """Set the width of each column and return the column names
+        formatted to that width.
+
+        :param maxwidths: list of the widest unpadded value of each column
+            or None when there are no values.
+        :param useheader: if True (default) - size columns on the names too.
+        :param cols: (optional) the columns sized.
+            * None: all of the columns of the layout.
+        :rtype: list of formatted column names.
+        """
+        if cols is None:
+            cols = self.cols
+
+        if maxwidths:
+            for idx, (key, cname) in enumerate(cols):
+                pv = self.vformatters[key, cname]
+
+                maxwidth = maxwidths[idx]
+                if pv.limit is not None and maxwidth > pv.limit:
+                    maxwidth = pv.limit
+
+                maxwidth = max(maxwidth, pv.width or 0)
+                if maxwidth > pv.maxwidth:
+                    pv.maxwidth = maxwidth
+
+        #If using headers then build the column size based on:
+        #    a) max size of column heading  -- or --
+        #    b) max size of values in column.
+        #If not using headers then build the column size based on:
+        #    a) max size of values in column.
+        headers = []
+        for key, cname in cols:
+            pc = self.cformatters[key, cname]
+            newcol = _format_header(pc, cname)
+
+            pv = self.vformatters[key, cname]
+            if useheader:
+                if pv.maxwidth > pc.maxwidth:
+                    pc.set_width(pv.maxwidth)
+                    pv.set_width(pv.maxwidth)
+
+                    newcol = _format_header(pc, cname)
+
+                else:
+                    pv.set_width(pc.maxwidth)
+
+            else:
+                pv.set_width(pv.maxwidth)
+
+            headers.append(newcol)
+
+        return headers
+
+    def _format_array(self, values, useheader=True):
+        """Return a pretty formatted list of the values of a NumPy array
+        or pandas DataFrame formatted a column at a time.
+
+        :param values: 2-D array, structured array or DataFrame to
+            pretty format.
+        :param useheader: if True (default) - headers returned with results.
+        """
+        if not self.cols:
+            if not len(values):
+                return []
+
+            self._default_array_cols(values)
+
+        stats = self._stats
+        if stats is not None:
+            started = stats.start()
+
+        columns = []
+        for key, cname in self.cols:
+            pv = self.vformatters[key, cname]
+            column = arrays.get_column(values, key)
+            columns.append(arrays.format_column(pv, column))
+
+            if stats is not None:
+                stats.count((key, cname), len(column))
+
+        if stats is not None:
+            stats.stop('format', started)
+
+        return self._join_columns(columns, len(values), useheader)
+
+    def _join_columns(self, columns, count, useheader=True):
+        """Size and pad the formatted columns and join them into rows.
+
+        :param columns: formatted column of each of the columns.
+        :param count: number of values in each column.
+        :param useheader: if True (default) - headers returned with results.
+        """
+        stats = self._stats
+        if stats is not None:
+            started = stats.start()
+
+        maxwidths = None
+        if count:
+            maxwidths = [column.maxwidth for column in columns]
+
+        headers = self._size_columns(maxwidths, useheader)
+
+        if stats is not None:
+            stats.stop('size', started)
+            started = stats.start()
+
+        padded = []
+        for (key, cname), column in itertools.izip(self.cols, columns):
+            pv = self.vformatters[key, cname]
+            padded.append(column.padded(pv.width or 0))
+
+        results = map(list, itertools.izip(*padded))
+
+        if useheader:
+            results.insert(0, headers)
+
+        if stats is not None:
+            stats.stop('pad', started)
+
+        return results
+
+    def text_columns(self, columns, title=None, useheader=True):
+        """Returns the text table of values given a column at a time.
+
+        :param columns: dict of sequences keyed like the columns or list
+            of sequences, all of the same length.
+        :param title: give the text table a title.
+        :param useheader: if True (default) - headers returned with results.
+        """
+        if self._stats is not None:
+            return self._instrumented(self._text_columns, columns, title,
+                                      useheader)
+
+        return self._text_columns(columns, title, useheader)
+
+    def _text_columns(self, columns, title, useheader):
+        records = self.format_columns(columns, useheader=useheader)
+        lines = self._iter_text_records(records, title, useheader)
+
+        stats = self._stats
+        if stats is None:
+            return '\n'.join(lines)
+
+        started = stats.start()
+        results = '\n'.join(lines)
+        stats.stop('assemble', started)
+        stats.bytes += len(results)
+
+        return results
+
+    def format_columns(self, columns, useheader=True):
+        """Return a pretty formatted list of values given a column at a
+        time.  Each column is formatted on its own and the columns are
+        only joined into rows once padded.
+
+        :param columns: dict of sequences keyed like the columns or list
+            of sequences, all of the same length.  Lists, array.array
+            and NumPy arrays are accepted as sequences.
+        :param useheader: if True (default) - headers returned with results.
+        """
+        if self._stats is not None:
+            return self._instrumented(self._format_columns, columns,
+                                      useheader)
+
+        return self._format_columns(columns, useheader)
+
+    def _format_columns(self, columns, useheader):
+        if not self.cols:
+            if not columns:
+                return []
+
+            self._default_cols(columns)
+
+        stats = self._stats
+        if stats is not None:
+            started = stats.start()
+
+        count = None
+        formatted = []
+        for key, cname in self.cols:
+            try:
+                column = columns[key]
+
+            except (KeyError, IndexError, TypeError):
+                if hasattr(columns, 'keys'):
+                    keys = columns.keys()
+
+                else:
+                    keys = range(len(columns))
+
+                msg = "Invalid key: '%s' columns: %s" % (key, keys)
+                raise KeyError(msg)
+
+            if count is None:
+                count = len(column)
+
+            elif len(column) != count:
+                msg = "column length mismatch: key:'%s' length:%s, "
+                msg = msg % (key, len(column))
+                msg = "%s expected:%s" % (msg, count)
+                raise ValueError(msg)
+
+            pv = self.vformatters[key, cname]
+            formatted.append(arrays.format_sequence(pv, column))
+
+            if stats is not None:
+                stats.count((key, cname), count)
+
+        if stats is not None:
+            stats.stop('format', started)
+
+        return self._join_columns(formatted, count, useheader)
+
+    def new_context(self, values=None):
+        """Returns a render context for the columns of the layout.
+        Without columns, default columns are made for the context from
+        the values and the layout is left unchanged.
+
+        :param values: (optional) values the default columns are made for.
+        :rtype: RenderContext.
+        """
+        columns = []
+        for key, cname in self.cols:
+            columns.append((key,
+                            cname,
+                            self.vformatters[key, cname],
+                            self.cformatters[key, cname]))
+
+        if columns or values is None:
+            return RenderContext(columns)
+
+        if arrays.is_array(values) or arrays.is_frame(values):
+            defaults = arrays.default_columns(values)
+
+        elif len(values):
+            try:
+                keys = values[0].keys()
+
+            except AttributeError:
+                keys = range(len(values[0]))
+
+            defaults = [(key, None) for key in keys]
+
+        else:
+            defaults = []
+
+        for key, vformat in defaults:
+            columns.append((key, key, PrettyValue(vformat), PrettyValue()))
+
+        return RenderContext(columns)
+
+    def render(self, values, useheader=True, context=None):
+        """Return a pretty formatted list of values like format, without
+        changing the layout.  The column widths only live in the render
+        context so a layout can be rendered by many threads at once.
+
+        :param values: list of values, NumPy 2-D or structured array or
+            pandas DataFrame to pretty format.
+        :param useheader: if True (default) - headers returned with results.
+        :param context: (optional) RenderContext of this layout, made by
+            new_context when not given.
+        """
+        if context is None:
+            context = self.new_context(values)
+
+        formatted = self._render_unpadded(values, context)
+
+        return self._render_records(formatted, context, useheader)
+
+    def update_context(self, values, context):
+        """Widen the columns of a render context to fit the values
+        without padding them, like render does before padding.
+
+        :param values: list of values, NumPy 2-D or structured array or
+            pandas DataFrame.
+        :param context: RenderContext of this layout.
+        """
+        self._render_unpadded(values, context)
+
+    def render_text(self, values, title=None, useheader=True, context=None):
+        """Returns the text table of the values like text, without
+        changing the layout.  See render.
+
+        :param values: list of values to pretty format to text.
+        :param title: give the text table a title.
+        :param useheader: if True (default) - headers returned with results.
+        :param context: (optional) RenderContext of this layout, made by
+            new_context when not given.
+        """
+        if context is None:
+            context = self.new_context(values)
+
+        formatted = self._render_unpadded(values, context)
+
+        return self._render_text(formatted, context, title, useheader)
+
+    def render_many(self, tables, useheader=True, shared=False):
+        """Returns the pretty formatted list of values of each table
+        like render.  The layout is reused as is and each table starts
+        from a fresh render context, so nothing is carried over from one
+        table to the next.
+
+        :param tables: list of the values of each table.
+        :param useheader: if True (default) - headers returned with results.
+        :param shared: (optional) if True - size the columns on all of the
+            tables so the tables line up.
+        :rtype: list of the results of each table.
+        """
+        return [self._render_records(formatted, context, useheader)
+                for formatted, context in self._render_all(tables, shared)]
+
+    def render_text_many(self, tables,
+                               titles=None,
+                               useheader=True,
+                               shared=False):
+        """Returns the text table of each table like render_text.  See
+        render_many.
+
+        :param tables: list of the values of each table.
+        :param titles: (optional) list of the title of each table.
+        :param useheader: if True (default) - headers returned with results.
+        :param shared: (optional) if True - size the columns on all of the
+            tables so the tables line up.
+        :rtype: list of the text of each table.
+        """
+        if titles is None:
+            titles = [None] * len(tables)
+
+        elif len(titles) != len(tables):
+            msg = "titles length mismatch: length:%s, expected:%s"
+            msg = msg % (len(titles), len(tables))
+            raise ValueError(msg)
+
+        results = []
+        rendered = self._render_all(tables, shared)
+        for (formatted, context), title in itertools.izip(rendered, titles):
+            results.append(self._render_text(formatted,
+                                             context,
+                                             title,
+                                             useheader))
+
+        return results
+
+    def _render_all(self, tables, shared):
+        """Returns the unpadded values of each table along with its render
+        context.  Shared tables all use one context so it is sized on all
+        of them.
+        """
+        if not shared:
+            results = []
+            for values in tables:
+                context = self.new_context(values)
+                results.append((self._render_unpadded(values, context),
+                                context))
+
+            return results
+
+        context = self.new_context()
+        if not context.columns:
+            for values in tables:
+                if len(values):
+                    context = self.new_context(values)
+                    break
+
+        return [(self._render_unpadded(values, context), context)
+                for values in tables]
+
+    def _render_unpadded(self, values, context):
+        """Format the values without padding and widen the context to
+        the widest of them.
+
+        :rtype: list of the formatted column of each of the columns.
+        """
+        if not context.columns:
+            return []
+
+        columns = []
+        if arrays.is_array(values) or arrays.is_frame(values):
+            for key, cname, pv, pc in context.columns:
+                column = arrays.get_column(values, key)
+                columns.append(arrays.format_column(pv, column))
+
+        else:
+            for key, cname, pv, pc in context.columns:
+                column = column_values(values, key)
+                columns.append(pv.format_values(column))
+
+        if len(values):
+            context.update([column.maxwidth for column in columns])
+
+        return columns
+
+    def _render_records(self, formatted, context, useheader):
+        """Returns the values of _render_unpadded padded to the widths of
+        the render context, the same as format.
+        """
+        if not context.columns:
+            return []
+
+        headers, widths = context.size(useheader)
+
+        padded = []
+        for column, width in itertools.izip(formatted, widths):
+            padded.append(column.padded(width))
+
+        results = map(list, itertools.izip(*padded))
+
+        if useheader:
+            results.insert(0, headers)
+
+        return results
+
+    def _render_text(self, formatted, context, title, useheader):
+        """Returns the text table of the values of _render_unpadded, the
+        same as text.
+        """
+        records = self._render_records(formatted, context, useheader)
+        if not records:
+            return ''
+
+        headers, widths = context.size(useheader)
+        if useheader:
+            records.pop(0)
+
+        else:
+            headers = None
+
+        return '\n'.join(self._iter_text(headers, widths, records, title))
+
+    def format(self, values,
+                     useheader=True,
+                     workers=None,
+                     max_rows=None,
+                     max_cols=None):
+        """Return a pretty formatted list of values based on the
+        format specifiers of the columns.
+
+        :param values: list of values, NumPy 2-D or structured array or
+            pandas DataFrame to pretty format.
+        :param useheader: if True (default) - headers returned with results.
+        :param workers: (optional) number of processes formatting the
+            rows of a list of values in chunks.
+            * None: format the rows in this process (default).
+        :param max_rows: (optional) most rows shown.  With more values
+            the first and last rows are shown with a row of '...' between
+            them, and only the rows shown are formatted.
+            * None: show all of the rows (default).
+        :param max_cols: (optional) most columns shown.  With more columns
+            the first and last columns are shown with a column of '...'
+            between them, and only the columns shown are formatted.
+            * None: show all of the columns (default).
+        """
+        if self._stats is not None:
+            return self._instrumented(self._format, values, useheader,
+                                      workers, max_rows, max_cols)
+
+        return self._format(values, useheader, workers, max_rows, max_cols)
+
+    def _format(self, values, useheader, workers, max_rows, max_cols):
+        if max_rows is not None or max_cols is not None:
+            return self._format_truncated(values,
+                                          useheader,
+                                          max_rows,
+                                          max_cols)
+
+        if arrays.is_array(values) or arrays.is_frame(values):
+            return self._format_array(values, useheader)
+
+        if workers is not None and workers < 1:
+            msg = "invalid workers: '%s'" % (workers,)
+            raise ValueError(msg)
+
+        #----------------------------------------------------------------------
+        #if user doesn't provide a set of columns then provide default
+        # column headings.  Either:
+        #   * indicies from a list or
+        #   * keys from a dictionary.
+        #----------------------------------------------------------------------
+        if not self.cols:
+            if not values:
+                return []
+
+            self._default_cols(values[0])
+
+        stats = self._stats
+        if stats is not None:
+            started = stats.start()
+
+        #This is the 1st pass to format each value without padding and
+        # determine the maximum size of each column.
+        formatters = [self.vformatters[key, cname] for key, cname in self.cols]
+
+        #the columns without a cache are formatted by the worker
+        # processes, which can't share the caches of the others.
+        texts = None
+        if workers and workers > 1 and len(values) > _PARALLEL_ROWS:
+            layout = [(key, pv._options(''))
+                      for (key, cname), pv in itertools.izip(self.cols,
+                                                             formatters)
+                      if pv.cache is None]
+
+            if layout:
+                texts = itertools.izip(*_format_parallel(layout,
+                                                         values,
+                                                         workers))
+
+        columns = []
+        for (key, cname), pv in itertools.izip(self.cols, formatters):
+            if texts is not None and pv.cache is None:
+                #the workers measured the values as they formatted them.
+                column, maxwidth, plain = next(texts)
+                column = arrays.TextColumn(pv, column, maxwidth, plain)
+                columns.append(pv.limit_column(column))
+
+                if stats is not None:
+                    stats.count((key, cname), len(values))
+
+                continue
+
+            column = column_values(values, key)
+
+            if stats is None:
+                columns.append(pv.format_values(column))
+
+            else:
+                columns.append(_counted_format(stats, (key, cname), pv,
+                                              column))
+
+        if stats is not None:
+            stats.stop('format', started)
+
+        return self._join_columns(columns, len(values), useheader)
+
+    def _format_truncated(self, values, useheader, max_rows, max_cols):
+        """Return a pretty formatted list of the first and last rows of
+        the first and last columns, formatting only the values shown.
+        See format.
+        """
+        if max_rows is not None and max_rows < 1:
+            msg = "invalid max_rows: '%s'" % (max_rows,)
+            raise ValueError(msg)
+
+        if max_cols is not None and max_cols < 1:
+            msg = "invalid max_cols: '%s'" % (max_cols,)
+            raise ValueError(msg)
+
+        isarray = arrays.is_array(values) or arrays.is_frame(values)
+
+        if not self.cols:
+            if not len(values):
+                return []
+
+            if isarray:
+                self._default_array_cols(values)
+
+            else:
+                self._default_cols(values[0])
+
+        #the columns shown, with the '...' column at split.
+        cols = self.cols
+        split = None
+        if max_cols is not None and len(cols) > max_cols:
+            split = (max_cols + 1) // 2
+            cols = cols[:split] + cols[len(cols) - max_cols // 2:]
+
+        #the rows shown, with the '...' row after the first part.
+        count = len(values)
+        parts = [values]
+        if max_rows is not None and count > max_rows:
+            parts = [values[:(max_rows + 1) // 2],
+                     values[count - max_rows // 2:]]
+
+        stats = self._stats
+        if stats is not None:
+            started = stats.start()
+
+        formatters = [self.vformatters[key, cname] for key, cname in cols]
+
+        formatted = []
+        for part in parts:
+            if not len(part):
+                continue
+
+            columns = []
+            for (key, cname), pv in itertools.izip(cols, formatters):
+                if isarray:
+                    column = arrays.get_column(part, key)
+                    columns.append(arrays.format_column(pv, column))
+
+                else:
+                    column = column_values(part, key)
+                    columns.append(pv.format_values(column))
+
+                if stats is not None:
+                    stats.count((key, cname), len(part))
+
+            formatted.append(columns)
+
+        if stats is not None:
+            stats.stop('format', started)
+            started = stats.start()
+
+        maxwidths = None
+        for columns in formatted:
+            widths = [column.maxwidth for column in columns]
+            if maxwidths is None:
+                maxwidths = widths
+
+            else:
+                maxwidths = map(max, maxwidths, widths)
+
+        if len(parts) > 1:
+            maxwidths = [max(width, len(_ELLIPSIS)) for width in maxwidths]
+
+        headers = self._size_columns(maxwidths, useheader, cols)
+        widths = [pv.width or 0 for pv in formatters]
+
+        if stats is not None:
+            stats.stop('size', started)
+            started = stats.start()
+
+        results = []
+        for columns in formatted:
+            padded = []
+            for column, width in itertools.izip(columns, widths):
+                padded.append(column.padded(width))
+
+            results.extend(map(list, itertools.izip(*padded)))
+
+            if len(parts) > 1 and len(results) == len(parts[0]):
+                results.append([_ellipsis_text(pv, width)
+                                for pv, width in itertools.izip(formatters,
+                                                                widths)])
+
+        if split is not None:
+            headers.insert(split, _ELLIPSIS)
+            for record in results:
+                record.insert(split, _ELLIPSIS)
+
+        if useheader:
+            results.insert(0, headers)
+
+        if stats is not None:
+            stats.stop('pad', started)
+
+        return results
+
+
+def write_lines(lines, fp, stats=None):
+    """Write the lines to a file-like object a chunk at a time, each
+    ending with a newline.
+
+    :param lines: iterable of lines without the newline.
+    :param fp: file-like object with a writelines method.
+    :param stats: (optional) RenderStats the time and bytes are added to.
+    :rtype: number of lines written.
+    """
+    if stats is not None:
+        started = stats.start()
+
+    count = 0
+    size = 0
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        chunk.append('\n')
+        count += 1
+        size += len(line) + 1
+
+        if len(chunk) >= _WRITE_CHUNK:
+            fp.writelines(chunk)
+            chunk = []
+
+    if chunk:
+        fp.writelines(chunk)
+
+    if stats is not None:
+        stats.stop('assemble', started)
+        stats.bytes += size
+
+    return count
+
+
+def column_values(values, key):
+    """Returns the list of the values of a column of the rows.
+
+    :param values: list of lists or dicts.
+    :param key: index of the list or key of the dict.
+    """
+    try:
+        return [row[key] for row in values]
+
+    except KeyError:
+        for row in values:
+            if key not in row:
+                msg = "Invalid key: '%s' row: %s" % (key, row)
+                raise KeyError(msg)
+
+        raise
+
+
+def _format_header(pc, cname):
+    """Returns the column name formatted to the width of its formatter.
+    A name with wide characters or escape sequences is padded to its
+    display width and the maxwidth of the formatter is its display width.
+    """
+    header = pc.format(cname)
+    if display.is_plain(header):
+        return header
+
+    header = pc.unpadded_formatter()(cname)
+    pc.maxwidth = max(display.text_width(header), pc.width or 0)
+
+    return pc.pad(header, display.pad_width(header, pc.maxwidth))
+
+
+def _ellipsis_text(pv, width):
+    """Returns the '...' of a row left out padded to the width of the
+    column, aligned like the values of the column but never filled.
+    """
+    if pv.align == '<':
+        return _ELLIPSIS.ljust(width)
+
+    if pv.align == '^':
+        return _ELLIPSIS.center(width)
+
+    return _ELLIPSIS.rjust(width)
+
+
+def _counted_format(stats, col, pv, values):
+    """Returns the formatted column of the values, counting the values,
+    the NaN and inf values and the cache hits in the stats.
+    """
+    cache = pv.cache
+    if cache is not None:
+        hits = cache.hits
+        misses = cache.misses
+
+    column = pv.format_values(values)
+
+    specials = 0
+    if pv.typesummary == 'float':
+        specials = sum(1 for value in values if _is_special(value))
+
+    if cache is None:
+        stats.count(col, len(values), specials)
+
+    else:
+        stats.count(col,
+                    len(values),
+                    specials,
+                    cache.hits - hits,
+                    cache.misses - misses)
+
+    return column
+
+
+def _counted_formatter(stats, col, pv):
+    """Returns the cached formatter of the PrettyValue counting each
+    value, the NaN and inf values and the cache hits in the stats.
+    """
+    formatter = pv.cached_formatter()
+    cache = pv.cache
+    floats = pv.typesummary == 'float'
+
+    def format_value(value):
+        if cache is not None:
+            hits = cache.hits
+            misses = cache.misses
+
+        text = formatter(value)
+
+        specials = 0
+        if floats and _is_special(value):
+            specials = 1
+
+        if cache is None:
+            stats.count(col, 1, specials)
+
+        else:
+            stats.count(col,
+                        1,
+                        specials,
+                        cache.hits - hits,
+                        cache.misses - misses)
+
+        return text
+
+    return format_value
+
+
+def _is_special(value):
+    """Returns True if the value is a NaN or inf number."""
+    try:
+        value = float(value)
+
+    except (TypeError, ValueError):
+        return False
+
+    return value - value != 0.0
+
+
+def _cpu_time():
+    """Returns the user and system CPU seconds of the process."""
+    times = os.times()
+
+    return times[0] + times[1]
+
+
+def _format_chunk(args):
+    """Format a chunk of rows without padding a column at a time.  Runs
+    in the worker processes of a parallel format so it only takes
+    picklable arguments.
+
+    :param args: tuple of the layout, a list of (key, options) for each
+        column, and the rows to format.
+    :rtype: tuple of the list of formatted values of each column, their
+        maximum widths and whether each column is plain, see
+        display.is_plain_column.
+    """
+    layout, values = args
+
+    if not values:
+        return [[] for column in layout], None, None
+
+    columns = []
+    maxwidths = []
+    plains = []
+    for key, options in layout:
+        column = column_values(values, key)
+        column = _get_column_formatter(options)(column)
+
+        plain = display.is_plain_column(column)
+        if plain:
+            maxwidth = max(itertools.imap(len, column))
+
+        else:
+            maxwidth = max(itertools.imap(display.text_width, column))
+
+        columns.append(column)
+        maxwidths.append(maxwidth)
+        plains.append(plain)
+
+    return columns, maxwidths, plains
+
+
+def pad_records(records, columns, widths):
+    """Pad the unpadded values of the records in place.
+
+    :param records: list of records of unpadded strings.
+    :param columns: list of (key, cname, vformatter, cformatter) of each
+        column of the records.
+    :param widths: width of each column.
+    """
+    for idx, (key, cname, pv, pc) in enumerate(columns):
+        width = widths[idx]
+        plain = display.is_plain_column([record[idx] for record in records])
+        for record in records:
+            newvalue = record[idx]
+            if plain:
+                size = len(newvalue)
+
+            else:
+                size = display.text_width(newvalue)
+
+            if size < width:
+                record[idx] = pv.pad(newvalue, width + len(newvalue) - size)
+
+            elif size > width and pv.limit is not None:
+                record[idx] = pv.fit(newvalue, width)
+
+
+def _format_parallel(layout, values, workers):
+    """Format the rows in chunks with a pool of worker processes.  The
+    chunks are merged back in order along with their maximum widths.
+
+    :param layout: list of (key, options) for each column.
+    :param values: list of rows to format.
+    :param workers: number of worker processes.
+    :rtype: tuple of the list of formatted values of each column, their
+        maximum widths and whether each column is plain.
+    """
+    size = max(_PARALLEL_ROWS, -(-len(values) // (workers * 4)))
+    chunks = [(layout, values[idx:idx + size])
+              for idx in xrange(0, len(values), size)]
+
+    pool = multiprocessing.Pool(min(workers, len(chunks)))
+    try:
+        chunks = pool.map(_format_chunk, chunks)
+
+    finally:
+        pool.terminate()
+        pool.join()
+
+    results = [[] for column in layout]
+    maxwidths = None
+    plains = None
+    for columns, chunkwidths, chunkplains in chunks:
+        for result, column in itertools.izip(results, columns):
+            result.extend(column)
+
+        if maxwidths is None:
+            maxwidths = chunkwidths
+            plains = chunkplains
+
+        elif chunkwidths:
+            maxwidths = map(max, maxwidths, chunkwidths)
+            plains = map(all, itertools.izip(plains, chunkplains))
+
+    return results, maxwidths, plains
+
+
+def _maxwidths(records, maxwidths=None):
+    """Returns the display width of the widest string in each column of
+    the records.
+
+    :param records: list of lists of strings.
+    :param maxwidths: (optional) widths from previous records to extend.
+    :rtype: list of widths or None when there are no records.
+    """
+    if not records:
+        return maxwidths
+
+    if maxwidths is None:
+        maxwidths = [0] * len(records[0])
+
+    for idx in xrange(len(maxwidths)):
+        column = [record[idx] for record in records]
+        maxwidths[idx] = max(maxwidths[idx], display.max_width(column))
+
+    return maxwidths
+
+
+def text_dash_line(widths):
+    """Returns the dash line of a text table with the column widths."""
+    dashes = ['-' * (width + 2) for width in widths]
+
+    return ''.join(('+', '+'.join(dashes), '+'))
+
+
+def text_line(fields):
+    """Returns the line of a text table holding the formatted fields."""
+    return ''.join(('| ', ' | '.join(fields), ' |'))
+
+
+def text_lines(fields):
+    """Returns the lines of a text table holding formatted fields that
+    may be wrapped onto more lines.  Fields with fewer lines are blank
+    on the lines below.
+    """
+    parts = [field.split('\n') for field in fields]
+    count = max(map(len, parts))
+
+    lines = []
+    for idx in xrange(count):
+        line = []
+        for part in parts:
+            if idx < len(part):
+                line.append(part[idx])
+
+            else:
+                line.append(' ' * display.text_width(part[0]))
+
+        lines.append(text_line(line))
+
+    return lines
 
 
 def _testit(verbose=None):
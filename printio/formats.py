@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2012, Mike Taylor
+#
+# This file is part of printio released under MIT license.
+# See the LICENSE for more information.
+
+"""
+
+Render the columns of a PrettyValues layout as other kinds of tables.
+
+The values are formatted with the formatters of the layout a chunk of rows
+at a time and streamed out.  None of these tables pads its values, so the
+columns are never sized and the values are only formatted once.
+
+"""
+
+import cgi
+import csv
+import StringIO
+import itertools
+
+import core
+import arrays
+
+
+#Number of rows formatted at a time.
+_CHUNK_ROWS = 1000
+
+#Characters escaped in HTML.
+_HTML_SPECIALS = '&<>"'
+
+#Characters escaped in Markdown cells, a line break ends a table row.
+_MARKDOWN_SPECIALS = '|\r\n'
+
+#text-align of the HTML cells of each alignment, left is the default.
+_HTML_ALIGNS = {'<': '',
+                '^': ' style="text-align:center"',
+                '>': ' style="text-align:right"',
+                '=': ' style="text-align:right"'}
+
+#Delimiter row cell of each alignment in Markdown.
+_MARKDOWN_ALIGNS = {'<': ':---',
+                    '^': ':---:',
+                    '>': '---:',
+                    '=': '---:'}
+
+#Number formats whose values never need escaping.
+_NUMBER_TYPES = ('int', 'float')
+
+
+def iter_html(layout, values, title=None, useheader=True):
+    """Generate the lines of an HTML table of the values.
+
+    :param layout: PrettyValues with the columns of the table.  The
+        layout is not changed.
+    :param values: iterable of values, NumPy 2-D or structured array or
+        pandas DataFrame.
+    :param title: (optional) caption of the table.
+    :param useheader: if True (default) - headers shown in the table.
+    :rtype: iterator of lines without the newline.
+    """
+    context, chunks = _iter_columns(layout, values)
+
+    yield '<table>'
+
+    if title:
+        yield '<caption>%s</caption>' % (cgi.escape(title, True),)
+
+    cells = []
+    headers = []
+    for key, cname, pv, pc in context.columns:
+        align = _HTML_ALIGNS[pv.align or '<']
+        cells.append('<td%s>' % (align,))
+
+        header = pc.unpadded_formatter()(cname)
+        headers.append('<th>%s</th>' % (cgi.escape(header, True),))
+
+    if useheader and headers:
+        yield '<thead>'
+        yield '<tr>%s</tr>' % (''.join(headers),)
+        yield '</thead>'
+
+    yield '<tbody>'
+
+    escapes = _escapes(context)
+
+    row = '<tr>%s</tr>' % (''.join('%s%%s</td>' % (cell,)
+                                   for cell in cells),)
+
+    for columns in chunks:
+        for idx, escape in enumerate(escapes):
+            if escape:
+                columns[idx] = _escape_column(columns[idx])
+
+        for line in itertools.imap(row.__mod__, itertools.izip(*columns)):
+            yield line
+
+    yield '</tbody>'
+    yield '</table>'
+
+
+def write_html(layout, values, fp, title=None, useheader=True):
+    """Write the HTML table of the values to a file-like object a chunk
+    of lines at a time.  See iter_html.
+
+    :param fp: file-like object with a writelines method.
+    :rtype: number of lines written.
+    """
+    lines = iter_html(layout, values, title=title, useheader=useheader)
+
+    return core.write_lines(lines, fp)
+
+
+def tb_html(layout, values, title=None, useheader=True):
+    """Returns the HTML table of the values as a string.  See iter_html."""
+    return '\n'.join(iter_html(layout, values,
+                               title=title,
+                               useheader=useheader))
+
+
+def iter_markdown(layout, values):
+    """Generate the lines of a GitHub-flavored Markdown table of the
+    values.  The delimiter row aligns each column as its PrettyValue does.
+    A '|' in a cell is escaped and a line break is written as <br>.
+
+    :param layout: PrettyValues with the columns of the table.  The
+        layout is not changed.
+    :param values: iterable of values, NumPy 2-D or structured array or
+        pandas DataFrame.
+    :rtype: iterator of lines without the newline.
+    """
+    context, chunks = _iter_columns(layout, values)
+    if not context.columns:
+        return
+
+    headers = []
+    delimiters = []
+    for key, cname, pv, pc in context.columns:
+        header = pc.unpadded_formatter()(cname)
+        headers.append(_escape_markdown(header))
+        delimiters.append(_MARKDOWN_ALIGNS[pv.align or '<'])
+
+    yield '| %s |' % (' | '.join(headers),)
+    yield '| %s |' % (' | '.join(delimiters),)
+
+    escapes = _escapes(context)
+    for columns in chunks:
+        for idx, escape in enumerate(escapes):
+            if escape:
+                columns[idx] = _escape_markdown_column(columns[idx])
+
+        for record in itertools.izip(*columns):
+            yield '| %s |' % (' | '.join(record),)
+
+
+def write_markdown(layout, values, fp):
+    """Write the Markdown table of the values to a file-like object a
+    chunk of lines at a time.  See iter_markdown.
+
+    :param fp: file-like object with a writelines method.
+    :rtype: number of lines written.
+    """
+    return core.write_lines(iter_markdown(layout, values), fp)
+
+
+def tb_markdown(layout, values):
+    """Returns the Markdown table of the values as a string.  See
+    iter_markdown.
+    """
+    return '\n'.join(iter_markdown(layout, values))
+
+
+def write_csv(layout, values, fp, useheader=True, **fmtparams):
+    """Write the values to a file-like object as CSV a chunk of rows at
+    a time.  The values are formatted by the layout but not padded.
+
+    :param layout: PrettyValues with the columns of the values.  The
+        layout is not changed.
+    :param values: iterable of values, NumPy 2-D or structured array or
+        pandas DataFrame.
+    :param fp: file-like object with a write method.
+    :param useheader: if True (default) - the first row is the headers.
+    :param fmtparams: (optional) csv.writer format parameters, the line
+        terminator defaults to a newline.
+    :rtype: number of rows written.
+    """
+    fmtparams.setdefault('lineterminator', '\n')
+    writer = csv.writer(fp, **fmtparams)
+
+    context, chunks = _iter_columns(layout, values)
+    if not context.columns:
+        return 0
+
+    count = 0
+    if useheader:
+        writer.writerow([pc.unpadded_formatter()(cname)
+                         for key, cname, pv, pc in context.columns])
+        count += 1
+
+    for columns in chunks:
+        writer.writerows(itertools.izip(*columns))
+        count += len(columns[0])
+
+    return count
+
+
+def write_tsv(layout, values, fp, useheader=True, **fmtparams):
+    """Write the values to a file-like object as tab separated values.
+    See write_csv.
+    """
+    fmtparams.setdefault('delimiter', '\t')
+
+    return write_csv(layout, values, fp, useheader=useheader, **fmtparams)
+
+
+def tb_csv(layout, values, useheader=True, **fmtparams):
+    """Returns the CSV of the values as a string.  See write_csv."""
+    fp = StringIO.StringIO()
+    write_csv(layout, values, fp, useheader=useheader, **fmtparams)
+
+    return fp.getvalue()
+
+
+def _escapes(context):
+    """Returns a list of whether each column of the render context may
+    need escaping.  Formatted numbers never do.
+    """
+    return [pv.typesummary not in _NUMBER_TYPES
+            for key, cname, pv, pc in context.columns]
+
+
+def _escape_column(texts):
+    """Returns the texts escaped for HTML.  The column is scanned for
+    the characters escaped first, so most columns aren't escaped a value
+    at a time.
+    """
+    joined = ''.join(texts)
+    for char in _HTML_SPECIALS:
+        if char in joined:
+            break
+
+    else:
+        return texts
+
+    return [cgi.escape(text, True) for text in texts]
+
+
+def _escape_markdown(text):
+    """Returns the text of a Markdown cell with '|' escaped and each line
+    break as <br>.
+    """
+    if '|' in text:
+        text = text.replace('|', '\\|')
+
+    if '\r' in text or '\n' in text:
+        text = '<br>'.join(text.splitlines())
+
+    return text
+
+
+def _escape_markdown_column(texts):
+    """Returns the texts escaped for Markdown cells.  See _escape_column."""
+    joined = ''.join(texts)
+    for char in _MARKDOWN_SPECIALS:
+        if char in joined:
+            break
+
+    else:
+        return texts
+
+    return [_escape_markdown(text) for text in texts]
+
+
+def _iter_columns(layout, values):
+    """Returns the render context of the values and an iterator of the
+    unpadded formatted columns of each chunk of rows.
+
+    :param layout: PrettyValues with the columns of the values.
+    :param values: iterable of values, NumPy 2-D or structured array or
+        pandas DataFrame.
+    :rtype: tuple of the RenderContext and the iterator.
+    """
+    if arrays.is_array(values) or arrays.is_frame(values):
+        context = layout.new_context(values)
+        return context, _iter_array_columns(context, values)
+
+    values = iter(values)
+    first = list(itertools.islice(values, _CHUNK_ROWS))
+
+    context = layout.new_context(first)
+
+    return context, _iter_row_columns(context, first, values)
+
+
+def _iter_row_columns(context, first, values):
+    """Generate the formatted columns of the rows a chunk at a time."""
+    formatters = [(key, pv.unpadded_column_formatter())
+                  for key, cname, pv, pc in context.columns]
+
+    chunk = first
+    while chunk:
+        yield [formatter(core.column_values(chunk, key))
+               for key, formatter in formatters]
+
+        chunk = list(itertools.islice(values, _CHUNK_ROWS))
+
+
+def _iter_array_columns(context, values):
+    """Generate the formatted columns of an array or DataFrame a chunk of
+    rows at a time.
+    """
+    formatters = []
+    for key, cname, pv, pc in context.columns:
+        column = arrays.get_column(values, key)
+        formatters.append((column, pv.unpadded_column_formatter()))
+
+    for start in xrange(0, len(values), _CHUNK_ROWS):
+        stop = start + _CHUNK_ROWS
+
+        columns = []
+        for column, formatter in formatters:
+            column = arrays.python_values(column[start:stop]).tolist()
+            columns.append(formatter(column))
+
+        yield columns
+
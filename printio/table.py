@@ -0,0 +1,465 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2012, Mike Taylor
+#
+# This file is part of printio released under MIT license.
+# See the LICENSE for more information.
+
+"""
+
+Text tables that grow a few rows at a time.
+
+The formatted values and the column widths are kept between refreshes so
+only the appended or updated rows are formatted again.  The older rows are
+only padded again when a column gets wider.
+
+PrettyPages renders one page of a sliceable sequence of values at a time,
+formatting only the rows of that page.
+
+LiveDisplay redraws the lines of a table on a terminal with ANSI cursor
+movement, rewriting only the parts of the lines that changed.
+
+"""
+
+import core
+import display
+
+
+#ANSI escape sequences used by LiveDisplay.
+_CURSOR_UP = '\x1b[%dA'
+_CURSOR_DOWN = '\x1b[%dB'
+_CURSOR_COLUMN = '\x1b[%dG'
+_CLEAR_LINE = '\x1b[K'
+_CLEAR_SCREEN = '\x1b[J'
+
+#Number of rows formatted at a time when the widths of all of the pages
+# are summarized.
+_SUMMARY_ROWS = 10000
+
+
+class PrettyTable(object):
+    """Text table of a PrettyValues layout that rows are appended to.
+
+    Usage:
+    >>> from core import PrettyValues
+    >>> pv = PrettyValues()
+    >>> pv.newcol(0, 'i', cname='Bar')
+    >>> pv.newcol(1, '+.2f', cname='Close')
+    >>> table = PrettyTable(pv)
+    >>> table.append([0, 23.45])
+    >>> table.append([1, 200.4565])
+    >>> print table.text()
+    +-----+---------+
+    | Bar | Close   |
+    +-----+---------+
+    |   0 | + 23.45 |
+    |   1 | +200.46 |
+    +-----+---------+
+    """
+
+    def __init__(self, layout, title=None, useheader=True):
+        """
+        :param layout: PrettyValues with the columns of the table.  The
+            layout is not changed by the table.
+        :param title: (optional) give the text table a title.
+        :param useheader: if True (default) - headers shown in the table.
+        """
+        self.layout = layout
+        self.title = title
+        self.useheader = useheader
+
+        self._context = None
+        if layout.cols:
+            self._set_context(layout.new_context())
+
+        #unpadded records of the rows.
+        self._records = []
+
+        #text lines of the first rows padded to _widths, the lines of a
+        # row with a wrapped value are joined by newlines.
+        self._lines = []
+        self._widths = None
+
+        #indices of the rows updated since their lines were made.
+        self._updated = set()
+
+    def __len__(self):
+        return len(self._records)
+
+    def append(self, row):
+        """Add a row to the end of the table.
+
+        :param row: list or dict of values.
+        """
+        self.extend([row])
+
+    def extend(self, rows):
+        """Add rows to the end of the table.
+
+        :param rows: list of lists or dicts of values.
+        """
+        self._records.extend(self._format(list(rows)))
+
+    def update(self, index, row):
+        """Replace the row at index.  Columns widen to fit the new values
+        but never narrow.
+
+        :param index: index of the row to replace.
+        :param row: list or dict of values.
+        """
+        if index < 0:
+            index += len(self._records)
+
+        if not 0 <= index < len(self._records):
+            msg = "invalid index: '%s' rows: %s" % (index, len(self._records))
+            raise IndexError(msg)
+
+        self._records[index] = self._format([row])[0]
+        self._updated.add(index)
+
+    def lines(self):
+        """Returns the text lines of the table, the same lines text
+        would give for all of the rows.
+
+        :rtype: list of lines without the newline.
+        """
+        context = self._context
+        if context is None or not context.columns:
+            return []
+
+        headers, widths = context.size(self.useheader)
+
+        if widths != self._widths:
+            self._lines = []
+            self._widths = widths
+            self._updated.clear()
+
+        for idx in self._updated:
+            if idx < len(self._lines):
+                self._lines[idx] = self._line(self._records[idx], widths)
+
+        self._updated.clear()
+
+        for record in self._records[len(self._lines):]:
+            self._lines.append(self._line(record, widths))
+
+        if not self._lines and not self.useheader:
+            return []
+
+        dash_line = core.text_dash_line(widths)
+
+        results = []
+        if self.title:
+            title = self.layout.get_text_title(self.title,
+                                               sum(widths),
+                                               len(widths))
+            results.extend(title.splitlines())
+
+        if self.useheader:
+            results.append(dash_line)
+            results.append(core.text_line(headers))
+
+        if self._lines:
+            results.append(dash_line)
+            for line in self._lines:
+                if '\n' in line:
+                    results.extend(line.split('\n'))
+
+                else:
+                    results.append(line)
+
+        results.append(dash_line)
+
+        return results
+
+    def text(self):
+        """Returns the text table of the rows, the same as the text of
+        the layout for all of the rows.
+        """
+        return '\n'.join(self.lines())
+
+    def _format(self, rows):
+        """Returns the unpadded records of the rows and widens the
+        columns to fit them.
+        """
+        if self._context is None:
+            if not rows:
+                return []
+
+            self._set_context(self.layout.new_context(rows))
+
+        columns = []
+        for key, cname, pv, pc in self._context.columns:
+            columns.append(pv.format_texts(core.column_values(rows, key)))
+
+        self._context.update([display.max_width(column)
+                              for column in columns])
+
+        return zip(*columns)
+
+    def _set_context(self, context):
+        """Use the render context for all of the rows of the table."""
+        self._context = context
+
+    def _line(self, record, widths):
+        """Returns the text line of an unpadded record."""
+        record = [list(record)]
+        core.pad_records(record, self._context.columns, widths)
+
+        line = core.text_line(record[0])
+
+        #a wrapped value continues on the lines below.
+        if '\n' in line:
+            line = '\n'.join(core.text_lines(record[0]))
+
+        return line
+
+
+class PrettyPages(object):
+    """Pages of a text table of a PrettyValues layout.  Only the rows of
+    the page rendered are formatted.
+
+    Usage:
+    >>> from core import PrettyValues
+    >>> pv = PrettyValues()
+    >>> pv.newcol(0, 'i', cname='Bar')
+    >>> pv.newcol(1, '.2f', cname='Close')
+    >>> values = [[i, i * 1.5] for i in xrange(5)]
+    >>> pages = PrettyPages(pv, values, 2)
+    >>> len(pages)
+    3
+    >>> print pages.text(1)
+    +-----+-------+
+    | Bar | Close |
+    +-----+-------+
+    |   2 |  3.00 |
+    |   3 |  4.50 |
+    +-----+-------+
+    """
+
+    def __init__(self, layout, values, pagesize,
+                       title=None,
+                       useheader=True,
+                       shared=False):
+        """
+        :param layout: PrettyValues with the columns of the table.  The
+            layout is not changed by the pages.
+        :param values: sequence of values that supports len and slicing,
+            such as a list, NumPy array or pandas DataFrame.
+        :param pagesize: number of rows of each page.
+        :param title: (optional) give the text table of each page a title.
+        :param useheader: if True (default) - headers shown on each page.
+        :param shared: (optional) if True - size the columns on all of the
+            values so every page lines up.  The widths are summarized the
+            first time a page is rendered and kept until reset.
+        """
+        if pagesize < 1:
+            raise ValueError("invalid pagesize: '%s'" % (pagesize,))
+
+        self.layout = layout
+        self.values = values
+        self.pagesize = pagesize
+        self.title = title
+        self.useheader = useheader
+        self.shared = shared
+
+        self._columns = layout.new_context(values[:1]).columns
+        self._maxwidths = None
+
+    def __len__(self):
+        """Returns the number of pages, an empty table has one page."""
+        return max(1, -(-len(self.values) // self.pagesize))
+
+    def render(self, page):
+        """Returns the pretty formatted list of values of the page like
+        the format of the layout.
+
+        :param page: index of the page.
+        """
+        return self.layout.render(self.page_values(page),
+                                  useheader=self.useheader,
+                                  context=self._context())
+
+    def text(self, page):
+        """Returns the text table of the page like the text of the layout.
+
+        :param page: index of the page.
+        """
+        return self.layout.render_text(self.page_values(page),
+                                       title=self.title,
+                                       useheader=self.useheader,
+                                       context=self._context())
+
+    def page_values(self, page):
+        """Returns the slice of the values on the page.
+
+        :param page: index of the page, negative indices count back from
+            the last page.
+        """
+        pages = len(self)
+        if page < 0:
+            page += pages
+
+        if not 0 <= page < pages:
+            raise IndexError("invalid page: '%s' pages: %s" % (page, pages))
+
+        start = page * self.pagesize
+
+        return self.values[start:start + self.pagesize]
+
+    def reset(self):
+        """Forget the widths summarized for shared pages, to be called
+        after the values change.
+        """
+        self._maxwidths = None
+
+    def _context(self):
+        """Returns a new render context of a page, widened to all of the
+        values when the pages are shared.
+        """
+        context = core.RenderContext(self._columns)
+
+        if self.shared:
+            if self._maxwidths is None:
+                self._maxwidths = self._summarize()
+
+            context.update(self._maxwidths)
+
+        return context
+
+    def _summarize(self):
+        """Returns the widest unpadded value of each column of all of the
+        values, formatted a chunk of rows at a time.
+        """
+        context = core.RenderContext(self._columns)
+
+        for start in xrange(0, len(self.values), _SUMMARY_ROWS):
+            chunk = self.values[start:start + _SUMMARY_ROWS]
+            self.layout.update_context(chunk, context)
+
+        return context.maxwidths
+
+
+class LiveDisplay(object):
+    """Keeps the lines last drawn on a terminal and redraws only what
+    changed.  The frame is drawn from the cursor position on and the
+    cursor is left at the start of the line below it.
+
+    Usage:
+    >>> import StringIO
+    >>> from core import PrettyValues
+    >>> pv = PrettyValues()
+    >>> pv.newcol(0, 'i', cname='Bar')
+    >>> table = PrettyTable(pv)
+    >>> display = LiveDisplay(StringIO.StringIO())
+    >>> table.append([0])
+    >>> display.draw(table.lines())
+    5
+    >>> table.append([1])
+    >>> display.draw(table.lines())
+    2
+    """
+
+    def __init__(self, fp):
+        """
+        :param fp: file-like object of the terminal.
+        """
+        self.fp = fp
+        self._lines = []
+
+    def draw(self, lines):
+        """Draw the lines over the lines drawn last.  A changed line of
+        the same length only has the changed characters written, unless
+        either line has wide characters or escape sequences, which don't
+        take up one column each, in which case it is written in full.
+
+        :param lines: list of lines without the newline.
+        :rtype: number of lines rewritten.
+        """
+        old = self._lines
+        lines = list(lines)
+
+        out = []
+        count = 0
+
+        #the cursor starts at the start of the line below the frame.
+        row = len(old)
+        for idx in xrange(min(len(old), len(lines))):
+            oldline = old[idx]
+            newline = lines[idx]
+            if oldline == newline:
+                continue
+
+            out.append(_move(row, idx))
+            row = idx
+
+            if (len(oldline) == len(newline)
+                    and display.is_plain_column((oldline, newline))):
+                start = 0
+                while oldline[start] == newline[start]:
+                    start += 1
+
+                end = len(newline)
+                while oldline[end - 1] == newline[end - 1]:
+                    end -= 1
+
+                out.append(_CURSOR_COLUMN % (start + 1))
+                out.append(newline[start:end])
+
+            else:
+                out.append('\r')
+                out.append(newline)
+                out.append(_CLEAR_LINE)
+
+            count += 1
+
+        if len(lines) < len(old):
+            out.append(_move(row, len(lines)))
+            out.append('\r')
+            out.append(_CLEAR_SCREEN)
+
+        else:
+            if row != len(old):
+                out.append(_move(row, len(old)))
+                out.append('\r')
+
+            for newline in lines[len(old):]:
+                out.append(newline)
+                out.append('\n')
+                count += 1
+
+        self.fp.write(''.join(out))
+
+        flush = getattr(self.fp, 'flush', None)
+        if flush is not None:
+            flush()
+
+        self._lines = lines
+
+        return count
+
+    def clear(self):
+        """Forget the lines drawn so the next frame is drawn in full
+        below them.
+        """
+        self._lines = []
+
+
+def _move(row, newrow):
+    """Returns the escape sequence moving the cursor from row to newrow."""
+    if newrow < row:
+        return _CURSOR_UP % (row - newrow)
+
+    if newrow > row:
+        return _CURSOR_DOWN % (newrow - row)
+
+    return ''
+
+
+def _testit(verbose=None):
+    import doctest
+    doctest.testmod(verbose=verbose)
+
+if __name__ == "__main__":
+    _testit()
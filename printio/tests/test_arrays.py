@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2012, Mike Taylor
+#
+# This file is part of printio released under MIT license.
+# See the LICENSE for more information.
+"""
+
+Test the arrays module.
+
+"""
+
+import os
+import sys
+import unittest
+import datetime
+
+libpath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if not libpath in sys.path:
+    sys.path.insert(1, libpath)
+del libpath
+
+import arrays
+from core import PrettyValues
+
+numpy = arrays.numpy
+
+try:
+    import pandas
+
+except ImportError:
+    pandas = None
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class PrettyValues_ArrayTestCase(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def assertSameAsRows(self, values, *columns):
+        """Format the array a column at a time and one row at a time."""
+        for useheader in (True, False):
+            results = []
+            for rows in (values, list(values)):
+                pv = PrettyValues()
+                for args in columns:
+                    pv.newcol(*args)
+
+                results.append(pv.format(rows, useheader=useheader))
+
+            self.assertEquals(results[0], results[1])
+
+    def test_format_array(self):
+        values = numpy.array([[0, 23.45, -1.5],
+                              [1, 200.4565, 0.025],
+                              [2, 1.00, float('nan')]])
+
+        pv = PrettyValues()
+
+        pv.newcol(0, 'i', cname='Bar')
+        pv.newcol(1, '+.2f', cname='Close')
+        pv.newcol(2, '.1%', vfill='*', cname='Change')
+
+        results = pv.format(values)
+
+        self.assertEquals(results[0], ['Bar', 'Close  ', 'Change '])
+        self.assertEquals(results[1], ['  0', '+ 23.45', '-150.0%'])
+        self.assertEquals(results[2], ['  1', '+200.46', '***2.5%'])
+        self.assertEquals(results[3], ['  2', '+  1.00', '****nan'])
+        self.assertEquals(len(results), 4)
+
+    def test_format_array_nocolumns(self):
+        values = numpy.array([[1, 22], [333, 4]])
+
+        results = PrettyValues().format(values)
+
+        self.assertEquals(results[0], ['0  ', '1 '])
+        self.assertEquals(results[1], ['1  ', '22'])
+        self.assertEquals(results[2], ['333', '4 '])
+        self.assertEquals(len(results), 3)
+
+        self.assertEquals(PrettyValues().format(values[:0]), [])
+
+    def test_format_structured(self):
+        values = numpy.array([(0, 'yhoo', 23.45),
+                              (1, 'goog', 200.4565)],
+                             dtype=[('bar', int),
+                                    ('sym', 'S4'),
+                                    ('close', float)])
+
+        results = PrettyValues().format(values)
+
+        self.assertEquals(results[0], ['bar', 'sym ', 'close   '])
+        self.assertEquals(results[1], ['0  ', 'yhoo', '23.45   '])
+        self.assertEquals(results[2], ['1  ', 'goog', '200.4565'])
+        self.assertEquals(len(results), 3)
+
+        pv = PrettyValues()
+        pv.newcol('open')
+
+        self.assertRaises(KeyError, pv.format, values)
+
+        self.assertSameAsRows(values, ('bar', 'i'), ('close', '=+.1f'))
+
+    def test_format_structured_cache(self):
+        values = numpy.array([(0, 'yhoo'), (1, 'goog'), (2, 'yhoo')],
+                             dtype=[('bar', int), ('sym', 'S4')])
+
+        pv = PrettyValues()
+        pv.newcol('bar', 'i')
+        pv.newcol('sym', cache=10)
+
+        expected = PrettyValues()
+        expected.newcol('bar', 'i')
+        expected.newcol('sym')
+
+        self.assertEquals(pv.format(values), expected.format(values))
+        self.assertEquals(pv.vformatters['sym', 'sym'].cache.misses, 2)
+
+    def test_format_floats(self):
+        column = numpy.array([0.0, -0.0, 0.125, 2.675, 1.005, -0.004,
+                              9.995, -9.995, 0.5, 1.5, 2.5, 1e16, -1e20,
+                              123456789.125, 1e-300, float('nan'),
+                              float('inf'), float('-inf')])
+        column = numpy.concatenate((column, numpy.random.randn(100) * 1e4))
+        values = numpy.column_stack((column, column[::-1]))
+
+        for vformat in ('f', '.2f', '+.1f', '= .3f', '^+.2f', '<.1%'):
+            for vfill in (None, '*', 0):
+                self.assertSameAsRows(values,
+                                      (0, vformat, vfill),
+                                      (1, vformat, vfill))
+
+    def test_format_ints(self):
+        column = numpy.array([0, 1, -1, 12345, -98765,
+                              numpy.iinfo(numpy.int64).min,
+                              numpy.iinfo(numpy.int64).max])
+        values = numpy.column_stack((column, column[::-1]))
+
+        for vformat in ('i', '+i', '=+i', '^ i', '<i', '>12i', '.2f'):
+            for vfill in (None, '*', 0):
+                self.assertSameAsRows(values,
+                                      (0, vformat, vfill),
+                                      (1, vformat, vfill))
+
+        values = numpy.array([[1.7, -2.9], [-0.5, 1e10]])
+        self.assertSameAsRows(values, (0, 'i'), (1, '+i'))
+
+        values = numpy.array([[True, False], [False, True]])
+        self.assertSameAsRows(values, (0, 'i'), (1, '.1f'))
+
+    def test_text_array(self):
+        values = numpy.array([[0, 23.45], [1, 200.4565]])
+
+        pv = PrettyValues()
+        pv.newcol(0, 'i', cname='Bar')
+        pv.newcol(1, '+.2f', cname='Close')
+
+        results = pv.text(values).split('\n')
+
+        self.assertEquals(results[0], '+-----+---------+')
+        self.assertEquals(results[1], '| Bar | Close   |')
+        self.assertEquals(results[2], '+-----+---------+')
+        self.assertEquals(results[3], '|   0 | + 23.45 |')
+        self.assertEquals(results[4], '|   1 | +200.46 |')
+        self.assertEquals(results[5], '+-----+---------+')
+        self.assertEquals(len(results), 6)
+
+
+@unittest.skipIf(pandas is None, 'pandas is not installed')
+class PrettyValues_FrameTestCase(unittest.TestCase):
+    def setUp(self):
+        self.frame = pandas.DataFrame({'bar': [0, 1, 2],
+                                       'sym': ['yhoo', 'goog', 'newp'],
+                                       'close': [23.45, 200.4565, 1.0],
+                                       'date': [datetime.datetime(2010, 7, 4),
+                                                datetime.datetime(2011, 1, 2),
+                                                datetime.datetime(2012, 3, 4,
+                                                                  12, 15)]},
+                                      columns=['bar', 'sym', 'close', 'date'])
+
+    def test_format_frame(self):
+        results = PrettyValues().format(self.frame)
+
+        self.assertEquals(results[0], ['bar', 'sym ', 'close   ',
+                                       'date               '])
+        self.assertEquals(results[1], ['  0', 'yhoo', ' 23.4500',
+                                       '2010-07-04 00:00:00'])
+        self.assertEquals(results[2], ['  1', 'goog', '200.4565',
+                                       '2011-01-02 00:00:00'])
+        self.assertEquals(results[3], ['  2', 'newp', '  1.0000',
+                                       '2012-03-04 12:15:00'])
+        self.assertEquals(len(results), 4)
+
+        self.assertEquals(PrettyValues().format(self.frame[:0]), [])
+
+    def test_format_frame_columns(self):
+        pv = PrettyValues()
+        pv.newcol('close', '+.2f', cname='Close')
+        pv.newcol('date', '%Y-%m-%d', cname='Date')
+        pv.newcol('sym', cname='Symbol')
+
+        results = pv.format(self.frame)
+
+        self.assertEquals(results[0], ['Close  ', 'Date      ', 'Symbol'])
+        self.assertEquals(results[1], ['+ 23.45', '2010-07-04', 'yhoo  '])
+        self.assertEquals(results[2], ['+200.46', '2011-01-02', 'goog  '])
+        self.assertEquals(results[3], ['+  1.00', '2012-03-04', 'newp  '])
+        self.assertEquals(len(results), 4)
+
+        pv = PrettyValues()
+        pv.newcol('open')
+
+        self.assertRaises(KeyError, pv.format, self.frame)
+
+    def test_iter_text_frame(self):
+        expected = PrettyValues().text(self.frame, title='Frame')
+
+        for options in ({'window': 2}, {'spill': True}):
+            pv = PrettyValues()
+            results = pv.iter_text(self.frame, title='Frame', **options)
+            self.assertEquals('\n'.join(results), expected)
+
+    def test_format_frame_nat(self):
+        frame = pandas.DataFrame({'date': pandas.to_datetime(['2012-01-02',
+                                                              None])})
+
+        results = PrettyValues().format(frame)
+
+        self.assertEquals(results, [['date               '],
+                                    ['2012-01-02 00:00:00'],
+                                    ['NaT                ']])
+
+        pv = PrettyValues()
+        pv.newcol('date', '%Y-%m-%d', cname='Date')
+
+        self.assertEquals(pv.text(frame).split('\n')[3:5],
+                          ['| 2012-01-02 |', '| NaT        |'])
+
+        for options in ({'window': 1}, {'spill': True}):
+            results = PrettyValues().iter_text(frame, **options)
+            self.assertEquals('\n'.join(results),
+                              PrettyValues().text(frame))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2012, Mike Taylor
+#
+# This file is part of printio released under MIT license.
+# See the LICENSE for more information.
+"""
+
+Test the benchmarks run.
+
+"""
+
+import os
+import sys
+import json
+import unittest
+
+libpath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if not libpath in sys.path:
+    sys.path.insert(1, libpath)
+del libpath
+
+from benchmarks import bench_core
+
+
+class BenchmarksTestCase(unittest.TestCase):
+    def test_run_benchmarks(self):
+        names = [name for name, cells, run in bench_core.benchmarks(0.001)]
+
+        baseline = os.path.join(os.path.dirname(bench_core.__file__),
+                                'baseline.json')
+        with open(baseline) as fp:
+            baseline = json.load(fp)
+
+        self.assertEquals(sorted(names), sorted(baseline['benchmarks']))
+
+        results = bench_core.run_benchmarks(scale=0.001,
+                                            repeat=1,
+                                            names=['format_lists', 'value_s'])
+
+        self.assertEquals(sorted(results['benchmarks']),
+                          ['format_lists', 'value_s'])
+
+        result = results['benchmarks']['format_lists']
+        self.assertEquals(result['cells'], 100)
+        self.assertTrue(result['cells_per_sec'] > 0)
+        self.assertTrue(result['peak_kb'] >= 0)
+
+        json.dumps(results)
+
+    def test_peak_memory(self):
+        self.assertTrue(bench_core.peak_memory('format_lists', 0.1) > 0)
+        self.assertRaises(KeyError, bench_core._run_peak, 'nope', 0.001)
+
+    def test_compare(self):
+        results = {'benchmarks': {'a': {'cells_per_sec': 70.0},
+                                  'b': {'cells_per_sec': 90.0},
+                                  'c': {'cells_per_sec': 1.0}}}
+        baseline = {'benchmarks': {'a': {'cells_per_sec': 100.0},
+                                   'b': {'cells_per_sec': 100.0}}}
+
+        self.assertEquals(bench_core.compare(results, baseline),
+                          [('a', 70.0, 100.0)])
+        self.assertEquals(bench_core.compare(results, baseline, 0.5), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
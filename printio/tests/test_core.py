@@ -13,7 +13,10 @@ Test the core module.
 
 import os
 import sys
+import array
+import StringIO
 import unittest
+import threading
 import datetime
 
 libpath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -21,6 +24,7 @@ if not libpath in sys.path:
     sys.path.insert(1, libpath)
 del libpath
 
+import core
 from core import PrettyValue
 from core import PrettyValues
 
@@ -414,6 +418,22 @@ class PrettyValue_ParseTestCase(unittest.TestCase):
         self.assertEquals(results['sign'], None)
         self.assertEquals(results['precision'], None)
 
+    def test_parse_rawtype_cache(self):
+        pv = PrettyValue()
+
+        maxsize = core._FORMATTERS_MAXSIZE
+        core._FORMATTERS_MAXSIZE = 8
+        try:
+            for width in range(20):
+                results = pv.parse_rawtype('%d.2f' % (width + 1,))
+                self.assertEquals(results['width'], width + 1)
+                self.assertTrue(len(core._parsed_rawtypes) <= 8)
+
+            self.assertEquals(pv.parse_rawtype('20.2f')['width'], 20)
+
+        finally:
+            core._FORMATTERS_MAXSIZE = maxsize
+
 
 class PrettyValue_FormatTestCase(unittest.TestCase):
     def setUp(self):
@@ -475,6 +495,14 @@ class PrettyValue_FormatTestCase(unittest.TestCase):
 
         self.assertRaises(ValueError, PrettyValue, '10.2s')
 
+    def test_format_unicode(self):
+        pv = PrettyValue('s')
+        self.assertEquals(pv.format(u'中文'), '中文')
+        self.assertEquals(pv.format(u'test'), 'test')
+
+        pv = PrettyValue('>6s')
+        self.assertEquals(pv.format(u'中文'), '    中文')
+
     def test_format_ints(self):
         pv = PrettyValue('i')
         results = pv.format('5')
@@ -715,6 +743,228 @@ class PrettyValue_FormatTestCase(unittest.TestCase):
         results = pv.format(5123.23456)
         self.assertEquals(pv.maxwidth, 6)
 
+    def test_format_specials(self):
+        pv = PrettyValue('=+5.1f')
+        self.assertEquals(pv.format('nan'), '  nan')
+        self.assertEquals(pv.format('inf'), '+ inf')
+        self.assertEquals(pv.format(float('-inf')), '- inf')
+
+        #no width specified.
+        pv = PrettyValue('.2f')
+        self.assertEquals(pv.format('nan'), 'nan')
+        self.assertEquals(pv.format('inf'), 'inf')
+        self.assertEquals(pv.format('-inf'), '-inf')
+
+    def test_format_setters(self):
+        pv = PrettyValue('i')
+        self.assertEquals(pv.format(5), '5')
+
+        pv.set_width(4)
+        self.assertEquals(pv.format(5), '   5')
+
+        pv.set_fill('*')
+        self.assertEquals(pv.format(5), '***5')
+
+        pv.setoptions('<+4.1f')
+        self.assertEquals(pv.format(5), '+5.0')
+        self.assertEquals(pv.maxwidth, 4)
+
+    def test_shared_formatters(self):
+        pv1 = PrettyValue('+10.2f')
+        pv2 = PrettyValue('+10.2f')
+        pv1.format(1)
+        pv2.format(2)
+        self.assertTrue(pv1._formatter is pv2._formatter)
+        self.assertFalse(hasattr(pv1, '__dict__'))
+
+        pv2.set_width(5)
+        pv2.format(2)
+        self.assertFalse(pv1._formatter is pv2._formatter)
+        self.assertEquals(pv1.format(1), '+     1.00')
+
+        results = pv1.parse_rawtype('+10.2f')
+        results['width'] = 3
+        self.assertEquals(pv2.parse_rawtype('+10.2f')['width'], 10)
+
+    def test_pad(self):
+        values = [5, -5, 23.456, 'nan', 'inf', '-inf']
+        for rawtext in ('^+.2f', '=+.1f', '= .1f', '<f', '>.2%'):
+            for fill in (None, '*', 0):
+                pv = PrettyValue(rawtext, fill=fill)
+                formatter = pv.unpadded_formatter()
+                for value in values:
+                    text = formatter(value)
+                    for width in range(12):
+                        expected = PrettyValue(rawtext, fill=fill,
+                                               width=width).format(value)
+                        self.assertEquals(pv.pad(text, width), expected)
+
+    def test_pad_column(self):
+        values = [5, -5, 23.456, 'nan', 'inf', '-inf']
+        for rawtext in ('^+.2f', '=+.1f', '= .1f', '<f', '>.2%'):
+            for fill in (None, '*', 0):
+                pv = PrettyValue(rawtext, fill=fill)
+                texts = map(pv.unpadded_formatter(), values)
+                for width in range(12):
+                    expected = [pv.pad(text, width) for text in texts]
+                    self.assertEquals(pv.pad_column(texts, width), expected)
+
+    def test_column_formatter(self):
+        columns = []
+        columns.append([0, 5, -5, 12345678901234567890, -1L])
+        columns.append([0.0, -0.0, 2.675, -1e300, 123456.789])
+        columns.append([1.5, float('nan'), -2.5])
+        columns.append([1.5, float('-inf'), -2.5])
+        columns.append([1e308, 1e308, -2.5])
+        columns.append([1.5, 2, '3.25', True])
+        columns.append([])
+        for rawtext in ('i', '+i', '.2f', '= .1f', '+.1%', '^+.3f'):
+            for fill in (None, '*'):
+                pv = PrettyValue(rawtext, fill=fill)
+                formatter = pv.unpadded_formatter()
+                column_formatter = pv.unpadded_column_formatter()
+                for column in columns:
+                    try:
+                        expected = map(formatter, column)
+
+                    except (ValueError, OverflowError) as err:
+                        self.assertRaises(type(err), column_formatter, column)
+                        continue
+
+                    self.assertEquals(column_formatter(column), expected)
+
+    def test_format_values(self):
+        columns = []
+        columns.append([0, 5, -5, 12345678901234567890, -1L])
+        columns.append([0, 7, 99, 100])
+        columns.append([0.0, -0.0, 2.675, -1e300, 123456.789])
+        columns.append([0.0, 1.0, -0.0])
+        columns.append([0.0, 1.0, -0.001, 0.5])
+        columns.append([9.995, 99.995, 0.00499, 0.005])
+        columns.append([1.5, float('nan'), -2.5])
+        columns.append([1.5, 2, '3.25'])
+        for rawtext in ('i', '+i', ' i', '.2f', '= .1f', '+.1%', '^+.3f'):
+            for fill in (None, '*'):
+                pv = PrettyValue(rawtext, fill=fill)
+                formatter = pv.unpadded_formatter()
+                for column in columns:
+                    try:
+                        texts = map(formatter, column)
+
+                    except (ValueError, OverflowError):
+                        continue
+
+                    results = pv.format_values(column)
+                    maxwidth = max(map(len, texts))
+                    self.assertEquals(results.maxwidth, maxwidth)
+
+                    for width in (0, maxwidth, maxwidth + 3):
+                        expected = [pv.pad(text, width) for text in texts]
+                        self.assertEquals(results.padded(width), expected)
+
+        results = PrettyValue('.2f').format_values([])
+        self.assertEquals(results.maxwidth, 0)
+        self.assertEquals(results.padded(4), [])
+
+    def test_cache(self):
+        values = [1, 1.0, True, 0.0, -0.0, float('nan'), 'abc', 1, 'abc']
+        for rawtext in (None, '^10', '+.2f'):
+            pv = PrettyValue(rawtext)
+            pv.set_cache(100)
+
+            cached = PrettyValue(rawtext)
+            for width in (0, 12):
+                try:
+                    expected = cached.format_values(values).padded(width)
+
+                except ValueError:
+                    self.assertRaises(ValueError, pv.format_values, values)
+                    continue
+
+                self.assertEquals(pv.format_values(values).padded(width),
+                                  expected)
+
+        pv = PrettyValue('.1f')
+        pv.set_cache(2)
+
+        #a value repeated in one column is looked up once.
+        pv.format_values([1.0, 2.0, 1.0])
+        self.assertEquals((pv.cache.hits, pv.cache.misses), (0, 2))
+
+        pv.format_values([2.0, 3.0])
+        self.assertEquals((pv.cache.hits, pv.cache.misses), (1, 3))
+        self.assertEquals(len(pv.cache), 2)
+
+        #1.0 was the least recently used so it was dropped.
+        pv.format_values([1.0])
+        self.assertEquals((pv.cache.hits, pv.cache.misses), (1, 4))
+
+        pv.set_precision(3)
+        column = pv.format_values([1.0])
+        self.assertEquals(column.padded(0), ['1.000'])
+        self.assertEquals((pv.cache.hits, pv.cache.misses), (1, 5))
+
+        formatter = pv.cached_formatter()
+        self.assertEquals(map(formatter, [1.0, -0.0, 0.0, -0.0]),
+                          ['1.000', '-0.000', '0.000', '-0.000'])
+        self.assertEquals((pv.cache.hits, pv.cache.misses), (3, 7))
+        self.assertEquals(formatter(float('nan')), 'nan')
+
+        pv.cache.clear()
+        self.assertEquals((len(pv.cache), pv.cache.hits), (0, 0))
+
+        pv = PrettyValue()
+        pv.set_cache(10)
+
+        column = pv.format_values([[1.0], [2.0]])
+        self.assertEquals(column.padded(0), ['[1.0]', '[2.0]'])
+        self.assertEquals(pv.cache.misses, 0)
+        self.assertEquals(pv.cached_formatter()([1.0]), '[1.0]')
+        self.assertEquals(pv.cache.misses, 0)
+
+        self.assertRaises(ValueError, pv.set_cache, 0)
+
+        pv = PrettyValues()
+        pv.newcol(0, cache=10)
+        pv.newcol(1, '.2f', cache=10)
+
+        expected = PrettyValues()
+        expected.newcol(0)
+        expected.newcol(1, '.2f')
+
+        values = [['yhoo', 1.5], ['goog', 2.25], ['yhoo', 1.5]]
+        self.assertEquals(pv.format(values), expected.format(values))
+        self.assertEquals(pv.format(values), expected.format(values))
+        self.assertEquals(pv.vformatters[0, 0].cache.hits, 2)
+
+        #the rows streamed and spilled are formatted through the cache.
+        cache = pv.vformatters[0, 0].cache
+        cache.clear()
+        self.assertEquals(list(pv.iter_text(values, window=1)),
+                          list(expected.iter_text(values, window=1)))
+        self.assertEquals((cache.hits, cache.misses), (1, 2))
+
+        cache.clear()
+        self.assertEquals(list(pv.iter_text(values, spill=True)),
+                          list(expected.iter_text(values, spill=True)))
+        self.assertEquals((cache.hits, cache.misses), (1, 2))
+
+    def test_fit(self):
+        pv = PrettyValue('<')
+        pv.set_limit(6)
+
+        self.assertEquals(pv.fit('newspaper', 6), 'newsp~')
+        self.assertEquals(pv.fit('東京東京', 6), '東京~')
+
+        #plain and wide values wrap at words the same way.
+        pv.set_limit(6, wrap=True)
+
+        self.assertEquals(pv.fit('ab  cd efgh', 6), 'ab  cd\nefgh  ')
+        self.assertEquals(pv.fit('東京  ab 東京', 6), '東京  \nab    \n東京  ')
+        self.assertEquals(pv.fit('ab  \x1b[31mcd\x1b[0m', 6),
+                          'ab  \x1b[31mcd\x1b[0m')
+
+
 
 class PrettyValues_TestCase(unittest.TestCase):
     def setUp(self):
@@ -1202,6 +1452,810 @@ class PrettyValues_TestCase(unittest.TestCase):
         self.assertEquals(results[3], ['2', 'newp...', '+  1.00'])
         self.assertEquals(len(results), 4)
 
+    def test_format_once(self):
+        class Value(object):
+            calls = 0
+
+            def __init__(self, value):
+                self.value = value
+
+            def __float__(self):
+                Value.calls += 1
+                return self.value
+
+        pv = PrettyValues()
+
+        pv.newcol(0, '^+.1f', vfill='*', cname='Close')
+
+        values = [[Value(1.0)], [Value(-200.5)], [Value(float('inf'))]]
+
+        results = pv.format(values)
+
+        self.assertEquals(Value.calls, 3)
+        self.assertEquals(results[0], ['Close '])
+        self.assertEquals(results[1], ['*+1.0*'])
+        self.assertEquals(results[2], ['-200.5'])
+        self.assertEquals(results[3], ['*+inf*'])
+        self.assertEquals(len(results), 4)
+
+    def test_iter_text(self):
+        pv = PrettyValues()
+
+        pv.newcol(0, 'i')
+        pv.newcol(1, cname='Column2')
+        pv.newcol(2, '+5.2f')
+
+        values = []
+        values.append([0, 'yhoo', 23.45])
+        values.append([1, 'goog', 200.4565])
+        values.append([2, 'newp', 1.00])
+
+        results = list(pv.iter_text(iter(values), window=2))
+
+        self.assertEquals(results[0], '+---+---------+---------+')
+        self.assertEquals(results[1], '| 0 | Column2 | 2       |')
+        self.assertEquals(results[2], '+---+---------+---------+')
+        self.assertEquals(results[3], '| 0 | yhoo    | + 23.45 |')
+        self.assertEquals(results[4], '| 1 | goog    | +200.46 |')
+        self.assertEquals(results[5], '| 2 | newp    | +  1.00 |')
+        self.assertEquals(results[6], '+---+---------+---------+')
+        self.assertEquals(len(results), 7)
+
+        self.assertEquals('\n'.join(pv.iter_text(values)), pv.text(values))
+
+    def test_iter_text_streams(self):
+        def feed():
+            yield [0, 'yhoo']
+            yield [1, 'goog']
+            raise RuntimeError('the feed is still open')
+
+        lines = PrettyValues().iter_text(feed(), window=1)
+
+        #each row is emitted as soon as it is read.
+        results = [next(lines) for idx in xrange(5)]
+
+        self.assertEquals(results[3], '| 0 | yhoo |')
+        self.assertEquals(results[4], '| 1 | goog |')
+        self.assertRaises(RuntimeError, next, lines)
+
+    def test_iter_text_overflow(self):
+        values = []
+        values.append([0, 'yhoo'])
+        values.append([1, 'goog'])
+        values.append([1234, 'newspaper'])
+
+        pv = PrettyValues()
+        pv.newcol(0, 'i', cname='Bar')
+        pv.newcol(1, cname='Symbol')
+
+        results = list(pv.iter_text(values, window=2, useheader=False))
+
+        self.assertEquals(results[0], '+---+------+')
+        self.assertEquals(results[1], '| 0 | yhoo |')
+        self.assertEquals(results[2], '| 1 | goog |')
+        self.assertEquals(results[3], '+------+-----------+')
+        self.assertEquals(results[4], '| 1234 | newspaper |')
+        self.assertEquals(results[5], '+------+-----------+')
+        self.assertEquals(len(results), 6)
+
+        #the rows after the widened row line up with it.
+        pv = PrettyValues()
+        pv.newcol(0, 'i', cname='Bar')
+        pv.newcol(1, cname='Symbol')
+
+        results = list(pv.iter_text(values + [[5, 'ibm'], [6, 'yhoo']],
+                                    window=2,
+                                    useheader=False))
+
+        self.assertEquals(results[3], '+------+-----------+')
+        self.assertEquals(results[4], '| 1234 | newspaper |')
+        self.assertEquals(results[5], '|    5 | ibm       |')
+        self.assertEquals(results[6], '|    6 | yhoo      |')
+        self.assertEquals(results[7], '+------+-----------+')
+        self.assertEquals(len(results), 8)
+
+        pv = PrettyValues()
+        pv.newcol(0, 'i', cname='Bar')
+        pv.newcol(1, cname='Symbol')
+
+        results = list(pv.iter_text(values, window=2, overflow='truncate'))
+
+        self.assertEquals(results[3], '|   0 | yhoo   |')
+        self.assertEquals(results[5], '| 123 | newspa |')
+        self.assertEquals(results[6], '+-----+--------+')
+        self.assertEquals(len(results), 7)
+
+        pv = PrettyValues()
+        pv.newcol(0, 'i', cname='Bar')
+        pv.newcol(1, cname='Symbol')
+
+        results = list(pv.iter_text(values, window=2, overflow='marker'))
+
+        self.assertEquals(results[5], '| 12~ | newsp~ |')
+        self.assertEquals(len(results), 7)
+
+        self.assertRaises(ValueError, pv.iter_text, values, overflow='wrap')
+        self.assertRaises(ValueError, pv.iter_text, values, window=0)
+
+    def test_format_workers(self):
+        values = []
+        for idx in range(25):
+            values.append({'bar': idx * 37,
+                           'sym': 'sym' * (idx % 4),
+                           'close': (idx - 12) * 10.0 ** (idx % 5)})
+
+        values.append({'bar': 3, 'sym': 'nan', 'close': 'nan'})
+
+        parallel_rows = core._PARALLEL_ROWS
+        core._PARALLEL_ROWS = 4
+        try:
+            for useheader in (True, False):
+                results = []
+                for workers in (None, 1, 3):
+                    pv = PrettyValues()
+                    pv.newcol('bar', 'i')
+                    pv.newcol('sym', cname='Symbol')
+                    pv.newcol('close', '=+.2f', vfill='0')
+
+                    results.append(pv.format(values,
+                                             useheader=useheader,
+                                             workers=workers))
+
+                self.assertEquals(results[0], results[1])
+                self.assertEquals(results[0], results[2])
+
+                #a column with a cache is formatted through it.
+                pv = PrettyValues()
+                pv.newcol('bar', 'i')
+                pv.newcol('sym', cname='Symbol', cache=10)
+                pv.newcol('close', '=+.2f', vfill='0')
+
+                self.assertEquals(pv.format(values,
+                                            useheader=useheader,
+                                            workers=3),
+                                  results[0])
+                self.assertEquals(pv.vformatters['sym', 'Symbol'].cache.misses,
+                                  5)
+
+            pv = PrettyValues()
+            self.assertEquals(pv.text(values, workers=3),
+                              PrettyValues().text(values))
+
+            pv = PrettyValues()
+            pv.newcol('open')
+            self.assertRaises(KeyError, pv.format, values, workers=3)
+
+            self.assertRaises(ValueError, PrettyValues().format, values,
+                              workers=0)
+
+            #the workers measure the values they format.
+            layout = [(0, PrettyValue()._options('')),
+                      (1, PrettyValue('i')._options(''))]
+            rows = [['東京', 1], ['ab', 12345]] * 5
+
+            texts, maxwidths, plains = core._format_parallel(layout, rows, 2)
+            self.assertEquals(texts[1], ['1', '12345'] * 5)
+            self.assertEquals(maxwidths, [4, 5])
+            self.assertEquals(plains, [False, True])
+
+        finally:
+            core._PARALLEL_ROWS = parallel_rows
+
+    def test_render(self):
+        values = []
+        values.append({'bar': 0, 'sym': 'yhoo', 'close': 23.45})
+        values.append({'bar': 1, 'sym': 'goog', 'close': 200.4565})
+        values.append({'bar': 12345, 'sym': 'nan', 'close': 'inf'})
+
+        def layout():
+            pv = PrettyValues()
+            pv.newcol('bar', 'i')
+            pv.newcol('sym', cname='Symbol', cformat='>')
+            pv.newcol('close', '=+.2f', vfill='0')
+            return pv
+
+        pv = layout()
+        for useheader in (True, False):
+            for rows in (values, values[:1], []):
+                self.assertEquals(pv.render(rows, useheader=useheader),
+                                  layout().format(rows, useheader=useheader))
+
+                self.assertEquals(pv.render_text(rows,
+                                                 title='Render',
+                                                 useheader=useheader),
+                                  layout().text(rows,
+                                                title='Render',
+                                                useheader=useheader))
+
+        #the layout is left as it was built.
+        for key, cname in pv.cols:
+            self.assertEquals(pv.vformatters[key, cname].width, '')
+            self.assertEquals(pv.vformatters[key, cname].maxwidth, 0)
+
+        pv = PrettyValues()
+        self.assertEquals(pv.render(values), PrettyValues().format(values))
+        self.assertEquals(pv.render_text(values, title='Defaults'),
+                          PrettyValues().text(values, title='Defaults'))
+        self.assertEquals(pv.cols, [])
+        self.assertEquals(pv.render([]), [])
+        self.assertEquals(pv.render_text([]), '')
+
+    def test_update_context(self):
+        pv = PrettyValues()
+        pv.newcol(0, 'i', cname='Bar')
+        pv.newcol(1, cname='Symbol')
+
+        context = pv.new_context()
+        pv.update_context([[12345, 'yhoo']], context)
+        pv.update_context([[1, 'newspaper']], context)
+        self.assertEquals(context.maxwidths, [5, 9])
+        self.assertEquals(pv.vformatters[0, 'Bar'].width, '')
+
+        self.assertEquals(pv.render([[1, 'a']], context=context),
+                          [['Bar  ', 'Symbol   '],
+                           ['    1', 'a        ']])
+
+    def test_render_after_format(self):
+        pv = PrettyValues()
+        pv.newcol(0, 'i', cname='Bar')
+        pv.newcol(1, cname='Symbol', cformat='10')
+
+        expected = pv.render_text([[1, 'a']])
+
+        #the widths format leaves on the layout don't reach a render.
+        pv.format([[123456789, 'long string here']])
+        self.assertEquals(pv.render_text([[1, 'a']]), expected)
+        self.assertEquals(pv.render([[1, 'a']], useheader=False),
+                          [['1', 'a']])
+
+        context = pv.new_context()
+        context.update([1, 1])
+        self.assertEquals(context.size(), (['Bar', 'Symbol    '], [3, 10]))
+
+    def test_render_many(self):
+        tables = []
+        tables.append([[0, 'yhoo', 23.45], [1, 'goog', 200.4565]])
+        tables.append([[12345, 'newspaper', -1.0]])
+        tables.append([])
+        tables.append([[2, 't', 'nan']])
+
+        def layout():
+            pv = PrettyValues()
+            pv.newcol(0, 'i', cname='Bar')
+            pv.newcol(1, cname='Symbol')
+            pv.newcol(2, '+.2f', cname='Close')
+            return pv
+
+        pv = layout()
+        for useheader in (True, False):
+            results = pv.render_many(tables, useheader=useheader)
+            expected = [layout().format(table, useheader=useheader)
+                        for table in tables]
+            self.assertEquals(results, expected)
+
+            results = pv.render_text_many(tables,
+                                          titles=['A', 'B', 'C', 'D'],
+                                          useheader=useheader)
+            expected = [layout().text(table, title=title, useheader=useheader)
+                        for table, title in zip(tables, 'ABCD')]
+            self.assertEquals(results, expected)
+
+        #shared widths line the tables up as if they were one table.
+        results = pv.render_many(tables, shared=True)
+        expected = layout().format(sum(tables, []))
+
+        self.assertEquals(results[0], expected[:3])
+        self.assertEquals(results[1], expected[:1] + expected[3:4])
+        self.assertEquals(results[2], expected[:1])
+        self.assertEquals(results[3], expected[:1] + expected[4:])
+
+        results = PrettyValues().render_many(tables, shared=True)
+        expected = PrettyValues().format(sum(tables, []))
+
+        self.assertEquals(results[1], expected[:1] + expected[3:4])
+
+        self.assertEquals(pv.render_many([]), [])
+        self.assertRaises(ValueError, pv.render_text_many, tables, ['A'])
+
+    def test_reset(self):
+        pv = PrettyValues()
+        pv.newcol(0, '5i', cname='Bar')
+        pv.newcol(1, '+.2f', cname='Close')
+
+        pv.format([[123456789, 1e9]])
+        pv.reset()
+
+        pv2 = PrettyValues()
+        pv2.newcol(0, '5i', cname='Bar')
+        pv2.newcol(1, '+.2f', cname='Close')
+
+        self.assertEquals(pv.format([[1, 2.0]]), pv2.format([[1, 2.0]]))
+
+        value = PrettyValue('5i')
+        value.format(123456789)
+        value.set_width(value.maxwidth)
+        value.reset()
+
+        self.assertEquals(value.maxwidth, 0)
+        self.assertEquals(value.width, 5)
+        self.assertEquals(value.format(1), '    1')
+
+    def test_render_threads(self):
+        pv = PrettyValues()
+        pv.newcol(0, 'i', cname='Bar')
+        pv.newcol(1, '+.2f', cname='Close')
+
+        tables = [[[idx, 10.0 ** size] for idx in range(size)]
+                  for size in range(1, 9)]
+        expected = []
+        for table in tables:
+            layout = PrettyValues()
+            layout.newcol(0, 'i', cname='Bar')
+            layout.newcol(1, '+.2f', cname='Close')
+            expected.append(layout.text(table))
+
+        errors = []
+
+        def render():
+            for _ in range(50):
+                for table, text in zip(tables, expected):
+                    if pv.render_text(table) != text:
+                        errors.append(table)
+
+        threads = [threading.Thread(target=render) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEquals(errors, [])
+
+    def test_stats(self):
+        values = []
+        values.append({'bar': 0, 'sym': 'yhoo', 'close': 23.45})
+        values.append({'bar': 1, 'sym': 'goog', 'close': 'nan'})
+        values.append({'bar': 2, 'sym': 'yhoo', 'close': float('inf')})
+
+        pv = PrettyValues()
+        pv.newcol('bar', 'i')
+        pv.newcol('sym', cname='Symbol', cache=10)
+        pv.newcol('close', '+.2f')
+
+        self.assertEquals(pv.stats(), None)
+
+        calls = []
+        pv.enable_stats(callback=calls.append)
+
+        results = pv.text(values, title='Stats')
+
+        stats = pv.stats()
+        self.assertEquals(stats['calls'], 1)
+        self.assertEquals(stats['bytes'], len(results))
+        self.assertEquals(sorted(stats['phases']),
+                          ['assemble', 'format', 'pad', 'size'])
+        self.assertEquals(stats['columns']['sym', 'Symbol'],
+                          {'cells': 3,
+                           'specials': 0,
+                           'cache_hits': 0,
+                           'cache_misses': 2})
+        self.assertEquals(stats['columns']['close', 'close']['specials'], 2)
+        self.assertEquals(sorted(stats['phases']['format']), ['cpu', 'wall'])
+        self.assertEquals(calls, [stats])
+
+        fp = StringIO.StringIO()
+        pv.write(values, fp)
+        pv.format(values)
+
+        stats = pv.stats()
+        self.assertEquals(stats['calls'], 3)
+        self.assertEquals(stats['bytes'], len(results) + len(fp.getvalue()))
+        self.assertEquals(stats['columns']['bar', 'bar']['cells'], 9)
+        self.assertEquals(len(calls), 3)
+
+        pv.disable_stats()
+        pv.format(values)
+        self.assertEquals(pv.stats(), None)
+        self.assertEquals(len(calls), 3)
+
+        #columns with the same name are counted apart.
+        pv = PrettyValues()
+        pv.newcol('bar', 'i', cname='Value')
+        pv.newcol('close', '+.2f', cname='Value')
+        pv.enable_stats()
+        pv.format(values)
+
+        stats = pv.stats()
+        self.assertEquals(stats['columns']['close', 'Value']['specials'], 2)
+        self.assertEquals(stats['columns']['bar', 'Value']['specials'], 0)
+
+    def test_stats_streamed(self):
+        values = [{'bar': idx, 'sym': 'sym%d' % (idx % 3), 'close': idx / 2.0}
+                  for idx in range(50)]
+        values[40]['close'] = 'nan'
+
+        def layout():
+            pv = PrettyValues()
+            pv.newcol('bar', 'i')
+            pv.newcol('sym', cache=10)
+            pv.newcol('close', '+.2f')
+            pv.enable_stats()
+            return pv
+
+        #the rows read after the window and the spilled rows are counted.
+        for options in ({'window': 10}, {'spill': True}):
+            pv = layout()
+            pv.write(values, StringIO.StringIO(), **options)
+
+            stats = pv.stats()
+            self.assertEquals(stats['calls'], 1)
+            self.assertTrue('format' in stats['phases'])
+            self.assertEquals(stats['columns']['bar', 'bar']['cells'], 50)
+            self.assertEquals(stats['columns']['close', 'close']['specials'],
+                              1)
+
+            counters = stats['columns']['sym', 'sym']
+            self.assertEquals(counters['cells'], 50)
+            self.assertEquals(counters['cache_misses'], 3)
+
+        #so are the columns of format_columns and text_columns.
+        columns = {'bar': [0, 1], 'sym': ['yhoo', 'goog'], 'close': [1.0, 2.0]}
+
+        calls = []
+        pv = layout()
+        pv.enable_stats(callback=calls.append)
+
+        pv.format_columns(columns)
+        results = pv.text_columns(columns)
+
+        stats = pv.stats()
+        self.assertEquals(stats['calls'], 2)
+        self.assertEquals(stats['bytes'], len(results))
+        self.assertEquals(sorted(stats['phases']),
+                          ['assemble', 'format', 'pad', 'size'])
+        self.assertEquals(stats['columns']['sym', 'sym']['cells'], 4)
+        self.assertEquals(len(calls), 2)
+
+    def test_iter_text_spill(self):
+        values = []
+        values.append({'bar': 0, 'sym': 'yhoo', 'close': 23.45})
+        values.append({'bar': 1, 'sym': 'goog', 'close': 200.4565})
+        values.append({'bar': 2, 'sym': 'newp', 'close': 1.00})
+        values.append({'bar': 3, 'sym': 'nan', 'close': 'nan'})
+        values.append({'bar': 12345, 'sym': 'newspaper', 'close': 'inf'})
+
+        spill_rows = core._SPILL_ROWS
+        core._SPILL_ROWS = 2
+        try:
+            for useheader in (True, False):
+                pv = PrettyValues()
+                pv.newcol('bar', 'i')
+                pv.newcol('sym', cname='Symbol')
+                pv.newcol('close', '+5.2f')
+
+                results = pv.iter_text(iter(values),
+                                       title='Spilled',
+                                       useheader=useheader,
+                                       spill=True)
+                results = '\n'.join(results)
+
+                pv = PrettyValues()
+                pv.newcol('bar', 'i')
+                pv.newcol('sym', cname='Symbol')
+                pv.newcol('close', '+5.2f')
+
+                expected = pv.text(values,
+                                   title='Spilled',
+                                   useheader=useheader)
+
+                self.assertEquals(results, expected)
+
+            pv = PrettyValues()
+            results = '\n'.join(pv.iter_text(iter(values), spill=True))
+            self.assertEquals(results, PrettyValues().text(values))
+
+            pv = PrettyValues()
+            self.assertEquals(list(pv.iter_text(iter([]), spill=True)), [])
+
+        finally:
+            core._SPILL_ROWS = spill_rows
+
+    def test_write(self):
+        class Output(object):
+            def __init__(self):
+                self.chunks = []
+
+            def writelines(self, lines):
+                self.chunks.append(''.join(lines))
+
+        values = [[idx, 'sym%s' % idx, idx * 1.5] for idx in range(3000)]
+
+        pv = PrettyValues()
+        pv.newcol(0, 'i', cname='Bar')
+        pv.newcol(1, cname='Symbol')
+        pv.newcol(2, '+.2f', cname='Close')
+
+        output = Output()
+        count = pv.write(values, output, title='Written')
+
+        results = ''.join(output.chunks)
+
+        self.assertEquals(count, 3006)
+        self.assertTrue(len(output.chunks) > 1)
+        self.assertEquals(results, pv.text(values, title='Written') + '\n')
+
+        output = Output()
+        count = PrettyValues().write([], output)
+        self.assertEquals(count, 0)
+        self.assertEquals(output.chunks, [])
+
+        #an iterator of rows is written with the default window too.
+        output = Output()
+        rows = (row for row in values)
+        self.assertEquals(pv.write(rows, output, title='Written'), 3006)
+        self.assertEquals(''.join(output.chunks), results)
+
+        self.assertEquals(list(pv.iter_text(iter(values))),
+                          pv.text(values).split('\n'))
+
+    def test_write_lines(self):
+        fp = StringIO.StringIO()
+        self.assertEquals(core.write_lines(iter(['a', 'bc']), fp), 2)
+        self.assertEquals(fp.getvalue(), 'a\nbc\n')
+
+        stats = core.RenderStats()
+        self.assertEquals(core.write_lines([], fp, stats), 0)
+        self.assertEquals(stats.bytes, 0)
+
+        core.write_lines(['abc'], fp, stats)
+        self.assertEquals(stats.bytes, 4)
+
+    def test_column_values(self):
+        values = [[0, 'yhoo'], [1, 'goog']]
+        self.assertEquals(core.column_values(values, 1), ['yhoo', 'goog'])
+
+        values = [{'bar': 0}, {'sym': 'goog'}]
+        self.assertRaises(KeyError, core.column_values, values, 'sym')
+        self.assertRaises(IndexError, core.column_values, [[0]], 1)
+
+    def test_format_max_rows(self):
+        values = [[idx, 'sym%s' % idx, idx * 1.5] for idx in range(1000)]
+
+        pv = PrettyValues()
+        pv.newcol(0, 'i', cname='Bar')
+        pv.newcol(1, '^', cname='Symbol')
+        pv.newcol(2, '+.2f', cname='Close')
+
+        results = pv.format(values, max_rows=3)
+
+        self.assertEquals(len(results), 5)
+        self.assertEquals(results[0], ['Bar', 'Symbol', 'Close   '])
+        self.assertEquals(results[1], ['  0', ' sym0 ', '+   0.00'])
+        self.assertEquals(results[2], ['  1', ' sym1 ', '+   1.50'])
+        self.assertEquals(results[3], ['...', ' ...  ', '     ...'])
+        self.assertEquals(results[4], ['999', 'sym999', '+1498.50'])
+
+        #the rows left out aren't formatted.
+        values[500][0] = 'not an int'
+        pv.reset()
+        self.assertEquals(pv.format(values, max_rows=3), results)
+
+        pv.reset()
+        values = values[:3]
+        self.assertEquals(pv.format(values, max_rows=3), pv.format(values))
+
+        self.assertRaises(ValueError, pv.format, values, max_rows=0)
+        self.assertRaises(ValueError, pv.format, values, max_cols=0)
+
+    def test_format_max_cols(self):
+        values = [range(idx, idx + 5) for idx in range(3)]
+
+        pv = PrettyValues()
+        results = pv.format(values, useheader=False, max_cols=2)
+
+        self.assertEquals(results, [['0', '...', '4'],
+                                    ['1', '...', '5'],
+                                    ['2', '...', '6']])
+
+        #the columns left out aren't formatted.
+        self.assertEquals(pv.vformatters[2, 2].width, '')
+
+    def test_text_max_rows(self):
+        values = [[idx, 'sym%s' % idx, 'x' * idx] for idx in range(5)]
+        values[2][1] = 'widest symbol'
+
+        pv = PrettyValues()
+        pv.newcol(0, 'i', cname='Bar')
+        pv.newcol(1, cname='Symbol')
+        pv.newcol(2, cname='Note')
+
+        results = pv.text(values, title='Notes', max_rows=2, max_cols=2)
+
+        self.assertEquals(results.split('\n'),
+                          ['+------------------+',
+                           '|       Notes      |',
+                           '+-----+-----+------+',
+                           '| Bar | ... | Note |',
+                           '+-----+-----+------+',
+                           '|   0 | ... |      |',
+                           '| ... | ... | ...  |',
+                           '|   4 | ... | xxxx |',
+                           '+-----+-----+------+',
+                           '3 of 5 rows and 1 of 3 columns not shown'])
+
+        self.assertEquals(pv.text([], max_rows=2), pv.text([]))
+
+    def test_format_maxwidth(self):
+        values = [[0, 'short'], [1, 'x' * 10000], [2, 'tiny']]
+
+        pv = PrettyValues()
+        pv.newcol(0, 'i', cname='Bar')
+        pv.newcol(1, cname='Error', maxwidth=8)
+
+        results = pv.format(values)
+
+        self.assertEquals(results, [['Bar', 'Error   '],
+                                    ['  0', 'short   '],
+                                    ['  1', 'xxxxxxx~'],
+                                    ['  2', 'tiny    ']])
+
+        self.assertEquals(pv.render(values), results)
+
+        #the column is no wider than its values.
+        pv.reset()
+        self.assertEquals(pv.format(values[:1], useheader=False),
+                          [['0', 'short']])
+
+        self.assertRaises(ValueError, pv.newcol, 2, maxwidth=0)
+
+    def test_text_wrap(self):
+        values = [[0, 'ok'], [1, 'the quick brown fox jumps'], [2, 'y' * 12]]
+
+        pv = PrettyValues()
+        pv.newcol(0, 'i', cname='Bar')
+        pv.newcol(1, cname='Message', maxwidth=10, wrap=True)
+
+        expected = ['+-----+------------+',
+                    '| Bar | Message    |',
+                    '+-----+------------+',
+                    '|   0 | ok         |',
+                    '|   1 | the quick  |',
+                    '|     | brown fox  |',
+                    '|     | jumps      |',
+                    '|   2 | yyyyyyyyyy |',
+                    '|     | yy         |',
+                    '+-----+------------+']
+
+        self.assertEquals(pv.text(values).split('\n'), expected)
+        self.assertEquals(pv.render_text(values).split('\n'), expected)
+
+        output = StringIO.StringIO()
+        pv.reset()
+        self.assertEquals(pv.write(values, output, spill=True), 10)
+        self.assertEquals(output.getvalue(), '\n'.join(expected) + '\n')
+
+    def test_text_display_width(self):
+        red = '\x1b[31m%s\x1b[0m'
+
+        values = [['東京', 1, red % 'up'],
+                  ['yhoo', 22, 'flat'],
+                  ['caf\xc3\xa9', 3, red % 'down']]
+
+        pv = PrettyValues()
+        pv.newcol(0, cname='名前')
+        pv.newcol(1, 'i', cname='Bar')
+        pv.newcol(2, '^', cname='Move')
+
+        expected = ['+------+-----+------+',
+                    '| 名前 | Bar | Move |',
+                    '+------+-----+------+',
+                    '| 東京 |   1 |  %s  |' % (red % 'up',),
+                    '| yhoo |  22 | flat |',
+                    '| caf\xc3\xa9 |   3 | %s |' % (red % 'down',),
+                    '+------+-----+------+']
+
+        self.assertEquals(pv.text(values).split('\n'), expected)
+        self.assertEquals(pv.render_text(values).split('\n'), expected)
+
+        output = StringIO.StringIO()
+        pv.reset()
+        pv.write(values, output, window=1)
+        self.assertEquals(output.getvalue(), '\n'.join(expected) + '\n')
+
+        output = StringIO.StringIO()
+        pv.reset()
+        pv.write(values, output, spill=True)
+        self.assertEquals(output.getvalue(), '\n'.join(expected) + '\n')
+
+    def test_text_unicode(self):
+        values = [[u'東京', 1],
+                  ['yhoo', 22],
+                  [u'caf\xe9', 3]]
+
+        pv = PrettyValues()
+        pv.newcol(0, cname=u'名前')
+        pv.newcol(1, 'i', cname='Bar')
+
+        expected = ['+------------+',
+                    '|     題     |',
+                    '+------+-----+',
+                    '| 名前 | Bar |',
+                    '+------+-----+',
+                    '| 東京 |   1 |',
+                    '| yhoo |  22 |',
+                    '| caf\xc3\xa9 |   3 |',
+                    '+------+-----+']
+
+        self.assertEquals(pv.text(values, title=u'題').split('\n'), expected)
+
+        output = StringIO.StringIO()
+        pv.reset()
+        pv.write(values, output, title=u'題', window=1)
+        self.assertEquals(output.getvalue(), '\n'.join(expected) + '\n')
+
+        #unicode and UTF-8 byte strings go in the same table.
+        pv = PrettyValues()
+        self.assertEquals(pv.text([[u'中文', '東京']]).split('\n')[3],
+                          '| 中文 | 東京 |')
+
+    def test_format_columns(self):
+        columns = {}
+        columns['bar'] = array.array('l', [0, 1, 2])
+        columns['sym'] = ['yhoo', 'goog', 'newp']
+        columns['close'] = array.array('d', [23.45, 200.4565, 1.0])
+
+        pv = PrettyValues()
+        pv.newcol('bar', 'i')
+        pv.newcol('sym', cname='Symbol')
+        pv.newcol('close', '+5.2f')
+
+        results = pv.format_columns(columns)
+
+        self.assertEquals(results[0], ['bar', 'Symbol', 'close  '])
+        self.assertEquals(results[1], ['  0', 'yhoo  ', '+ 23.45'])
+        self.assertEquals(results[2], ['  1', 'goog  ', '+200.46'])
+        self.assertEquals(results[3], ['  2', 'newp  ', '+  1.00'])
+        self.assertEquals(len(results), 4)
+
+        rows = [dict((key, columns[key][idx]) for key in columns)
+                for idx in range(3)]
+
+        results = pv.text_columns(columns, title='Columns')
+        self.assertEquals(results, pv.text(rows, title='Columns'))
+
+        results = pv.format_columns(dict((key, []) for key in columns),
+                                    useheader=False)
+        self.assertEquals(results, [])
+
+        columns['sym'] = ['yhoo', 'goog']
+        self.assertRaises(ValueError, pv.format_columns, columns)
+
+        del columns['sym']
+        self.assertRaises(KeyError, pv.format_columns, columns)
+
+    def test_format_columns_nocolumns(self):
+        columns = [[0, 1, 2], ['yhoo', 'goog', 'newp'], [23.45, 200.4565, 1.0]]
+
+        results = PrettyValues().format_columns(columns)
+
+        self.assertEquals(results[0], ['0', '1   ', '2       '])
+        self.assertEquals(results[1], ['0', 'yhoo', '23.45   '])
+        self.assertEquals(results[2], ['1', 'goog', '200.4565'])
+        self.assertEquals(results[3], ['2', 'newp', '1.0     '])
+        self.assertEquals(len(results), 4)
+
+        self.assertEquals(PrettyValues().format_columns([]), [])
+
+        #a list of columns raises the same error as a dict.
+        pv = PrettyValues()
+        pv.newcol(0)
+        pv.newcol(3)
+        self.assertRaises(KeyError, pv.format_columns, columns)
+
+        pv = PrettyValues()
+        pv.newcol('sym')
+        self.assertRaises(KeyError, pv.format_columns, columns)
+
     def test_format_invalids(self):
         pv = PrettyValues()
 
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2012, Mike Taylor
+#
+# This file is part of printio released under MIT license.
+# See the LICENSE for more information.
+"""
+
+Test the display module.
+
+"""
+
+import os
+import sys
+import unittest
+
+libpath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if not libpath in sys.path:
+    sys.path.insert(1, libpath)
+del libpath
+
+import display
+
+
+RED = '\x1b[31m'
+RESET = '\x1b[0m'
+
+
+class DisplayTestCase(unittest.TestCase):
+    def test_text_width(self):
+        self.assertEquals(display.text_width(''), 0)
+        self.assertEquals(display.text_width('yhoo'), 4)
+        self.assertEquals(display.text_width(u'yhoo'), 4)
+
+        #byte strings are read as UTF-8.
+        self.assertEquals(display.text_width('東京'), 4)
+        self.assertEquals(display.text_width(u'東京'), 4)
+        self.assertEquals(display.text_width(u'ｘｙ'), 4)
+        self.assertEquals(display.text_width(u'café'), 4)
+        self.assertEquals(display.text_width(u'cafe\u0301'), 4)
+        self.assertEquals(display.text_width(u'\U0001f600!'), 3)
+        self.assertEquals(display.text_width('\xff\xfe'), 2)
+
+        self.assertEquals(display.text_width(RED + 'red' + RESET), 3)
+        self.assertEquals(display.text_width('\x1b]0;title\x07ok'), 2)
+
+    def test_char_width(self):
+        self.assertEquals(display.char_width(u'a'), 1)
+        self.assertEquals(display.char_width(u'あ'), 2)
+        self.assertEquals(display.char_width(u'\u0301'), 0)
+        self.assertEquals(display.char_width(u'\u00ad'), 1)
+        self.assertEquals(display.char_width(u'\U00020000'), 2)
+        self.assertEquals(display.char_width(u'\U000e0001'), 0)
+        self.assertEquals(display.char_width(u'\U00010000'), 1)
+
+    def test_columns(self):
+        self.assertTrue(display.is_plain_column(['sym', 'yhoo']))
+        self.assertTrue(display.is_plain_column([]))
+        self.assertFalse(display.is_plain_column(['sym', '東京']))
+        self.assertFalse(display.is_plain_column([u'sym', u'東京']))
+        self.assertFalse(display.is_plain_column(['sym', RED + 'x']))
+
+        self.assertEquals(display.max_width([]), 0)
+        self.assertEquals(display.max_width(['sym', 'yhoo']), 4)
+        self.assertEquals(display.max_width(['yhoo', '東京']), 4)
+        self.assertEquals(display.max_width(['yhoo', '東京都']), 6)
+
+        self.assertEquals(display.pad_width('yhoo', 8), 8)
+        self.assertEquals(display.pad_width('東京', 8), 10)
+        self.assertEquals(display.pad_width(u'東京', 8), 6)
+
+    def test_cut(self):
+        self.assertEquals(display.cut('yhoo', 2), 'yh')
+        self.assertEquals(display.cut('東京', 3), '東')
+        self.assertEquals(display.cut(u'東京', 4), u'東京')
+        self.assertEquals(display.cut(u'a東京', 2), u'a')
+
+        #the escape sequences are kept.
+        self.assertEquals(display.cut(RED + 'yhoo' + RESET, 2),
+                          RED + 'yh' + RESET)
+
+    def test_split(self):
+        self.assertEquals(display.split('yhoogoog', 3), ['yho', 'ogo', 'og'])
+        self.assertEquals(display.split('', 3), [''])
+        self.assertEquals(display.split(u'東京ab', 3), [u'東', u'京a', u'b'])
+        self.assertEquals(display.split('東京', 1), ['東', '京'])
+
+    def test_wrap(self):
+        self.assertEquals(display.wrap('the quick brown fox', 10),
+                          ['the quick', 'brown fox'])
+        self.assertEquals(display.wrap('a  b   c', 4), ['a  b', 'c'])
+        self.assertEquals(display.wrap('  ab cd  ', 5), ['  ab', 'cd'])
+        self.assertEquals(display.wrap('ab yhoogoog', 3),
+                          ['ab', 'yho', 'ogo', 'og'])
+        self.assertEquals(display.wrap('', 3), [''])
+        self.assertEquals(display.wrap('     ', 3), ['   ', '  '])
+
+        #words are measured by display width.
+        self.assertEquals(display.wrap(u'東京 ab 京', 4),
+                          [u'東京', u'ab', u'京'])
+        self.assertEquals(display.wrap('東京 ab', 5), ['東京', 'ab'])
+        self.assertEquals(display.wrap(RED + 'up' + RESET + ' down', 7),
+                          [RED + 'up' + RESET + ' down'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2012, Mike Taylor
+#
+# This file is part of printio released under MIT license.
+# See the LICENSE for more information.
+"""
+
+Test the formats module.
+
+"""
+
+import os
+import sys
+import unittest
+import StringIO
+
+libpath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if not libpath in sys.path:
+    sys.path.insert(1, libpath)
+del libpath
+
+import formats
+from core import PrettyValues
+
+numpy = formats.arrays.numpy
+
+
+class HtmlTestCase(unittest.TestCase):
+    def setUp(self):
+        self.values = []
+        self.values.append({'bar': 0, 'sym': 'yhoo', 'close': 23.45})
+        self.values.append({'bar': 1, 'sym': 'a&<b>', 'close': 'nan'})
+
+        self.pv = PrettyValues()
+        self.pv.newcol('bar', 'i', cname='Bar')
+        self.pv.newcol('sym', '^', cname='"Symbol"')
+        self.pv.newcol('close', '+.2f')
+
+    def test_tb_html(self):
+        results = formats.tb_html(self.pv, self.values, title='<Quotes>')
+
+        results = results.split('\n')
+
+        self.assertEquals(results[0], '<table>')
+        self.assertEquals(results[1], '<caption>&lt;Quotes&gt;</caption>')
+        self.assertEquals(results[2], '<thead>')
+        self.assertEquals(results[3], '<tr><th>Bar</th>'
+                                      '<th>&quot;Symbol&quot;</th>'
+                                      '<th>close</th></tr>')
+        self.assertEquals(results[4], '</thead>')
+        self.assertEquals(results[5], '<tbody>')
+        self.assertEquals(results[6], '<tr>'
+                                      '<td style="text-align:right">0</td>'
+                                      '<td style="text-align:center">yhoo</td>'
+                                      '<td style="text-align:right">+23.45</td>'
+                                      '</tr>')
+        self.assertEquals(results[7], '<tr>'
+                                      '<td style="text-align:right">1</td>'
+                                      '<td style="text-align:center">'
+                                      'a&amp;&lt;b&gt;</td>'
+                                      '<td style="text-align:right">nan</td>'
+                                      '</tr>')
+        self.assertEquals(results[8], '</tbody>')
+        self.assertEquals(results[9], '</table>')
+        self.assertEquals(len(results), 10)
+
+        #the layout isn't sized.
+        self.assertEquals(self.pv.vformatters['bar', 'Bar'].width, '')
+
+    def test_write_html(self):
+        values = [[idx, 'sym%d' % idx] for idx in range(2500)]
+
+        fp = StringIO.StringIO()
+        count = formats.write_html(PrettyValues(), iter(values), fp,
+                                   useheader=False)
+
+        results = fp.getvalue().split('\n')
+
+        self.assertEquals(count, 2504)
+        self.assertEquals(results[:2], ['<table>', '<tbody>'])
+        self.assertEquals(results[2], '<tr><td>0</td><td>sym0</td></tr>')
+        self.assertEquals(results[2501],
+                          '<tr><td>2499</td><td>sym2499</td></tr>')
+        self.assertEquals(results[-3:], ['</tbody>', '</table>', ''])
+
+        results = formats.tb_html(PrettyValues(), [])
+        self.assertEquals(results, '<table>\n<tbody>\n</tbody>\n</table>')
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_tb_html_array(self):
+        values = numpy.array([(0, 'yhoo', 23.45),
+                              (1, 'goog', 200.4565)],
+                             dtype=[('bar', int),
+                                    ('sym', 'S4'),
+                                    ('close', float)])
+
+        pv = PrettyValues()
+        pv.newcol('bar', 'i')
+        pv.newcol('close', '.1f')
+
+        rows = [dict(zip(values.dtype.names, row)) for row in values.tolist()]
+
+        self.assertEquals(formats.tb_html(pv, values),
+                          formats.tb_html(pv, rows))
+
+
+class MarkdownTestCase(unittest.TestCase):
+    def setUp(self):
+        self.values = []
+        self.values.append({'bar': 0, 'sym': 'yhoo', 'close': 23.45})
+        self.values.append({'bar': 1, 'sym': 'a|b', 'close': 'nan'})
+
+        self.pv = PrettyValues()
+        self.pv.newcol('bar', 'i', cname='Bar')
+        self.pv.newcol('sym', '^', cname='Sym|bol')
+        self.pv.newcol('close', '<+.2f')
+
+    def test_tb_markdown(self):
+        results = formats.tb_markdown(self.pv, self.values).split('\n')
+
+        self.assertEquals(results[0], '| Bar | Sym\\|bol | close |')
+        self.assertEquals(results[1], '| ---: | :---: | :--- |')
+        self.assertEquals(results[2], '| 0 | yhoo | +23.45 |')
+        self.assertEquals(results[3], '| 1 | a\\|b | nan |')
+        self.assertEquals(len(results), 4)
+
+        self.assertEquals(formats.tb_markdown(PrettyValues(), []), '')
+
+    def test_tb_markdown_lines(self):
+        values = [{'bar': 0, 'sym': 'two\nlines', 'close': 1.0},
+                  {'bar': 1, 'sym': 'a|b\r\nc\n', 'close': 2.0}]
+
+        self.pv.newcol('sym', cname='Sym\nbol')
+
+        results = formats.tb_markdown(self.pv, values).split('\n')
+
+        self.assertEquals(results[0],
+                          '| Bar | Sym\\|bol | close | Sym<br>bol |')
+        self.assertEquals(results[2],
+                          '| 0 | two<br>lines | +1.00 | two<br>lines |')
+        self.assertEquals(results[3],
+                          '| 1 | a\\|b<br>c | +2.00 | a\\|b<br>c |')
+        self.assertEquals(len(results), 4)
+
+    def test_write_markdown(self):
+        fp = StringIO.StringIO()
+        count = formats.write_markdown(self.pv, self.values, fp)
+
+        self.assertEquals(count, 4)
+        self.assertEquals(fp.getvalue(),
+                          formats.tb_markdown(self.pv, self.values) + '\n')
+
+
+class CsvTestCase(unittest.TestCase):
+    def setUp(self):
+        self.values = []
+        self.values.append([0, 'yhoo', 23.45])
+        self.values.append([1, 'a, "b"', 200.4565])
+
+        self.pv = PrettyValues()
+        self.pv.newcol(0, '>10i', cname='Bar')
+        self.pv.newcol(1, None, cname='Sym')
+        self.pv.newcol(2, '+.2f', cname='Close')
+
+    def test_tb_csv(self):
+        results = formats.tb_csv(self.pv, self.values)
+
+        self.assertEquals(results, 'Bar,Sym,Close\n'
+                                   '0,yhoo,+23.45\n'
+                                   '1,"a, ""b""",+200.46\n')
+
+        results = formats.tb_csv(self.pv, self.values,
+                                 useheader=False,
+                                 lineterminator='\r\n')
+
+        self.assertEquals(results, '0,yhoo,+23.45\r\n'
+                                   '1,"a, ""b""",+200.46\r\n')
+
+    def test_write_tsv(self):
+        values = [[idx, 'sym%d' % idx, idx / 4.0] for idx in range(2500)]
+
+        fp = StringIO.StringIO()
+        count = formats.write_tsv(self.pv, iter(values), fp)
+
+        results = fp.getvalue().split('\n')
+
+        self.assertEquals(count, 2501)
+        self.assertEquals(results[0], 'Bar\tSym\tClose')
+        self.assertEquals(results[1], '0\tsym0\t+0.00')
+        self.assertEquals(results[2500], '2499\tsym2499\t+624.75')
+        self.assertEquals(results[2501], '')
+
+
+if __name__ == "__main__":
+    unittest.main()
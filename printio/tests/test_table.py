@@ -0,0 +1,354 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2012, Mike Taylor
+#
+# This file is part of printio released under MIT license.
+# See the LICENSE for more information.
+"""
+
+Test the table module.
+
+"""
+
+import os
+import re
+import sys
+import unittest
+import StringIO
+
+libpath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if not libpath in sys.path:
+    sys.path.insert(1, libpath)
+del libpath
+
+from core import PrettyValues
+import table
+from table import PrettyTable
+from table import PrettyPages
+from table import LiveDisplay
+
+
+class PrettyTableTestCase(unittest.TestCase):
+    def setUp(self):
+        self.values = []
+        self.values.append({'bar': 0, 'sym': 'yhoo', 'close': 23.45})
+        self.values.append({'bar': 1, 'sym': 'goog', 'close': 200.4565})
+        self.values.append({'bar': 2, 'sym': 'newp', 'close': 1.00})
+        self.values.append({'bar': 3, 'sym': 'nan', 'close': 'nan'})
+        self.values.append({'bar': 12345, 'sym': 'newspaper', 'close': 'inf'})
+
+    def layout(self):
+        pv = PrettyValues()
+        pv.newcol('bar', 'i')
+        pv.newcol('sym', cname='Symbol')
+        pv.newcol('close', '+5.2f')
+        return pv
+
+    def test_append(self):
+        for useheader in (True, False):
+            pv = self.layout()
+            table = PrettyTable(pv, title='Quotes', useheader=useheader)
+
+            self.assertEquals(table.text(),
+                              self.layout().text([],
+                                                 title='Quotes',
+                                                 useheader=useheader))
+
+            for idx, row in enumerate(self.values):
+                table.append(row)
+
+                expected = self.layout().text(self.values[:idx + 1],
+                                              title='Quotes',
+                                              useheader=useheader)
+                self.assertEquals(table.text(), expected)
+
+            self.assertEquals(len(table), len(self.values))
+            self.assertEquals(pv.vformatters['bar', 'bar'].width, '')
+
+    def test_extend(self):
+        table = PrettyTable(PrettyValues())
+        self.assertEquals(table.text(), '')
+
+        table.extend(self.values[:2])
+        self.assertEquals(table.text(), PrettyValues().text(self.values[:2]))
+
+        table.extend(self.values[2:])
+        self.assertEquals(table.text(), PrettyValues().text(self.values))
+
+    def test_extend_cache(self):
+        pv = PrettyValues()
+        pv.newcol('bar', 'i')
+        pv.newcol('sym', cname='Symbol', cache=10)
+        pv.newcol('close', '+5.2f')
+
+        table = PrettyTable(pv)
+        table.extend(self.values)
+        table.extend(self.values)
+        self.assertEquals(table.text(), self.layout().text(self.values * 2))
+
+        #the rows are formatted through the cache of the column.
+        cache = pv.vformatters['sym', 'Symbol'].cache
+        self.assertEquals((cache.hits, cache.misses), (5, 5))
+
+    def test_update(self):
+        table = PrettyTable(self.layout())
+        table.extend(self.values)
+        table.text()
+
+        row = {'bar': 4, 'sym': 'upd', 'close': -2.5}
+        table.update(2, row)
+
+        values = list(self.values)
+        values[2] = row
+        self.assertEquals(table.text(), self.layout().text(values))
+
+        row = {'bar': 12345, 'sym': 'much wider symbol', 'close': -2.5}
+        table.update(-1, row)
+
+        values[-1] = row
+        self.assertEquals(table.text(), self.layout().text(values))
+
+        self.assertRaises(IndexError, table.update, 5, row)
+
+    def test_update_narrower(self):
+        table = PrettyTable(self.layout())
+        table.extend(self.values)
+        table.update(4, {'bar': 4, 'sym': 'upd', 'close': 1.0})
+
+        lines = table.lines()
+
+        #the columns never narrow.
+        self.assertEquals(lines[-2], '|     4 | upd       | +  1.00 |')
+        self.assertEquals(len(lines[-2]), len(lines[0]))
+
+    def test_wrap(self):
+        pv = PrettyValues()
+        pv.newcol('bar', 'i', cname='Bar')
+        pv.newcol('sym', cname='Sym', maxwidth=4, wrap=True)
+
+        table = PrettyTable(pv)
+        table.extend(self.values)
+
+        lines = table.lines()
+
+        self.assertEquals(lines, pv.render_text(self.values).split('\n'))
+        self.assertEquals(lines[-4], '| 12345 | news |')
+        self.assertEquals(lines[-3], '|       | pape |')
+        self.assertEquals(lines[-2], '|       | r    |')
+
+
+class Rows(object):
+    """Sequence of rows that records the slices taken of it."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.slices = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        self.slices.append((index.start, index.stop))
+        return self.rows[index]
+
+
+class PrettyPagesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.values = [[idx, 'sym%d' % (idx * 37 % 101,), idx * 1.5]
+                       for idx in range(23)]
+
+        self.pv = PrettyValues()
+        self.pv.newcol(0, 'i', cname='Bar')
+        self.pv.newcol(1, None, cname='Symbol')
+        self.pv.newcol(2, '+.2f', cname='Close')
+
+    def test_text(self):
+        values = Rows(self.values)
+        pages = PrettyPages(self.pv, values, 10, title='Quotes')
+
+        self.assertEquals(len(pages), 3)
+        del values.slices[:]
+
+        self.assertEquals(pages.text(1),
+                          self.pv.render_text(self.values[10:20],
+                                              title='Quotes'))
+        self.assertEquals(values.slices, [(10, 20)])
+
+        self.assertEquals(pages.text(-1),
+                          self.pv.render_text(self.values[20:],
+                                              title='Quotes'))
+        self.assertEquals(pages.render(0),
+                          self.pv.render(self.values[:10]))
+
+        self.assertRaises(IndexError, pages.text, 3)
+        self.assertRaises(IndexError, pages.text, -4)
+        self.assertRaises(ValueError, PrettyPages, self.pv, values, 0)
+
+        #the layout isn't sized.
+        self.assertEquals(self.pv.vformatters[0, 'Bar'].width, '')
+
+    def test_shared(self):
+        values = Rows(self.values)
+        pages = PrettyPages(self.pv, values, 10, shared=True)
+
+        tables = [self.values[:10], self.values[10:20], self.values[20:]]
+        expected = self.pv.render_text_many(tables, shared=True)
+
+        self.assertEquals(pages.text(2), expected[2])
+
+        #the widths are summarized once.
+        del values.slices[:]
+        self.assertEquals(pages.text(0), expected[0])
+        self.assertEquals(pages.text(1), expected[1])
+        self.assertEquals(values.slices, [(0, 10), (10, 20)])
+
+    def test_summary_chunks(self):
+        rows = table._SUMMARY_ROWS
+        table._SUMMARY_ROWS = 4
+        try:
+            values = Rows(self.values)
+            pages = PrettyPages(self.pv, values, 5, shared=True)
+            del values.slices[:]
+
+            self.assertEquals(pages.render(0)[0],
+                              self.pv.render(self.values)[0])
+            self.assertEquals(values.slices[:3], [(0, 5), (0, 4), (4, 8)])
+
+        finally:
+            table._SUMMARY_ROWS = rows
+
+    def test_empty(self):
+        pages = PrettyPages(self.pv, [], 10, shared=True)
+
+        self.assertEquals(len(pages), 1)
+        self.assertEquals(pages.text(0), self.pv.render_text([]))
+
+        pages = PrettyPages(PrettyValues(), [], 10)
+        self.assertEquals(pages.text(0), '')
+
+
+class Terminal(object):
+    """Screen of lines following the escape sequences of LiveDisplay."""
+    regex = re.compile(r'\x1b\[(\d*)([ABGKJ])|(.)', re.DOTALL)
+
+    def __init__(self):
+        self.screen = [[]]
+        self.row = 0
+        self.col = 0
+
+    def write(self, text):
+        for count, code, char in self.regex.findall(text):
+            line = self.screen[self.row]
+            if code == 'A':
+                self.row -= int(count)
+
+            elif code == 'B':
+                self.row += int(count)
+
+            elif code == 'G':
+                self.col = int(count) - 1
+
+            elif code == 'K':
+                del line[self.col:]
+
+            elif code == 'J':
+                del line[self.col:]
+                del self.screen[self.row + 1:]
+
+            elif char == '\r':
+                self.col = 0
+
+            elif char == '\n':
+                self.row += 1
+                self.col = 0
+                if self.row == len(self.screen):
+                    self.screen.append([])
+
+            else:
+                line[self.col:self.col + 1] = [char]
+                self.col += 1
+
+    def lines(self):
+        return [''.join(line) for line in self.screen]
+
+
+class LiveDisplayTestCase(unittest.TestCase):
+    def test_draw(self):
+        terminal = Terminal()
+        display = LiveDisplay(terminal)
+
+        frames = []
+        frames.append(['+---+', '| a |', '+---+'])
+        frames.append(['+---+', '| b |', '+---+'])
+        frames.append(['+---+', '| b |', '| c |', '+---+'])
+        frames.append(['+-----+', '| b   |', '| cde |', '+-----+'])
+        frames.append(['+-----+', '| b   |', '+-----+'])
+        frames.append(['+-----+', '| b   |', '+-----+'])
+        frames.append([])
+
+        for lines in frames:
+            display.draw(lines)
+
+            self.assertEquals(terminal.lines(), lines + [''])
+            self.assertEquals(terminal.col, 0)
+
+    def test_draw_changed(self):
+        fp = StringIO.StringIO()
+        display = LiveDisplay(fp)
+
+        self.assertEquals(display.draw(['| 1 | abc |', '| 2 | def |']), 2)
+        self.assertEquals(fp.getvalue(), '| 1 | abc |\n| 2 | def |\n')
+
+        fp.truncate(0)
+        self.assertEquals(display.draw(['| 1 | abc |', '| 2 | dxf |']), 1)
+        self.assertEquals(fp.getvalue(), '\x1b[1A\x1b[8Gx\x1b[1B\r')
+
+        fp.truncate(0)
+        self.assertEquals(display.draw(['| 1 | abc |', '| 2 | dxf |']), 0)
+        self.assertEquals(fp.getvalue(), '')
+
+        display.clear()
+        fp.truncate(0)
+        self.assertEquals(display.draw(['| 1 |']), 1)
+        self.assertEquals(fp.getvalue(), '| 1 |\n')
+
+    def test_draw_wide(self):
+        fp = StringIO.StringIO()
+        display = LiveDisplay(fp)
+
+        #wide and colored lines are rewritten in full.
+        display.draw([u'| \u6771\u4eac | abc |'])
+        fp.truncate(0)
+        display.draw([u'| \u6771\u4eac | axc |'])
+        self.assertEquals(fp.getvalue(),
+                          u'\x1b[1A\r| \u6771\u4eac | axc |\x1b[K\x1b[1B\r')
+
+        display.clear()
+        display.draw(['| \x1b[31mabc\x1b[0m |'])
+        fp.truncate(0)
+        display.draw(['| \x1b[31maxc\x1b[0m |'])
+        self.assertEquals(fp.getvalue(),
+                          '\x1b[1A\r| \x1b[31maxc\x1b[0m |\x1b[K\x1b[1B\r')
+
+    def test_draw_table(self):
+        pv = PrettyValues()
+        pv.newcol('bar', 'i')
+        pv.newcol('close', '+.2f')
+
+        table = PrettyTable(pv, title='Live')
+        terminal = Terminal()
+        display = LiveDisplay(terminal)
+
+        for idx in range(20):
+            table.append({'bar': idx, 'close': 1.5 ** idx})
+            if idx > 2:
+                table.update(idx // 2, {'bar': -idx, 'close': idx})
+
+            display.draw(table.lines())
+
+            self.assertEquals(terminal.lines(), table.lines() + [''])
+
+
+if __name__ == "__main__":
+    unittest.main()